@@ -0,0 +1,436 @@
+"""
+Soak benchmark, runs the OnlineStreamer and its collectors against a synthetic firehose for a long time,
+without any Twitter access, and reports throughput, latency percentiles and memory over time.
+The stream and the API are replaced by local stand-ins generating status and user payloads at a configurable
+rate and distribution (repeated users, retweets, quotes, replies, media), so that the whole path from on_data
+to the collectors, backups included, is exercised. Thresholds turn it into a regression gate.
+
+usage: python benchmarks/soak.py [--duration 60] [--rate 0] [--n-statuses 50] [--statuses] [--admission 1000]
+                                 [--max-p99-ms 50] [--min-throughput 100] [--max-rss-growth-mb 200] [--json out.json]
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import tweepy
+from tweepy.models import Status, User
+
+# runnable from a plain checkout, without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ptdc import AccountCollector, OnlineStreamer, StatusCollector
+from ptdc.admission import AdmissionController, FifoBuffer
+
+DATE_FORMAT = "%a %b %d %H:%M:%S +0000 %Y"
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+WORDS = ("data", "stream", "photo", "holiday", "news", "today", "great", "new", "check", "this", "out", "love")
+HASHTAGS = ("photo", "holiday", "news", "ai", "sport", "music", "travel", "food")
+SYMBOLS = ("AAPL", "TSLA", "BTC")
+
+
+class SyntheticFirehose(object):
+
+    """ Deterministic generator of status and user payloads, in the Twitter v1.1 json format """
+
+    def __init__(self,
+                 seed=0,
+                 repeat=0.5,
+                 skew=3.0,
+                 p_retweet=0.3,
+                 p_quote=0.1,
+                 p_reply=0.15,
+                 p_media=0.2,
+                 max_timeline=400):
+
+        """
+        SyntheticFirehose constructor
+        :param seed: random seed
+        :param repeat: probability that a status comes from a user already streamed
+        :param skew: skew of the repeated users, the higher the more the first users are repeated
+        :param p_retweet: probability that a status is a retweet
+        :param p_quote: probability that a status is a quote
+        :param p_reply: probability that a status is a reply
+        :param p_media: probability that a status shares a media
+        :param max_timeline: maximum number of statuses of a user timeline
+        """
+
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.repeat = repeat
+        self.skew = skew
+        self.p_retweet = p_retweet
+        self.p_quote = p_quote
+        self.p_reply = p_reply
+        self.p_media = p_media
+        self.max_timeline = max_timeline
+        self._users = []
+        self._next_status = 10 ** 15
+
+    def user(self, user_id):
+
+        """
+        Returns the payload of a user, always the same for the same id
+        :param user_id: int
+        :return: dict
+        """
+
+        rng = random.Random(user_id * 7919 + self.seed)
+        followers = int(rng.paretovariate(1.2) * 10)
+        friends = rng.randint(0, 2000)
+        return {"id": user_id, "id_str": str(user_id), "name": "User {}".format(user_id),
+                "screen_name": "user{}".format(user_id), "location": rng.choice(("", "Rome", "Paris", "NYC")),
+                "url": None, "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))),
+                "protected": False, "verified": rng.random() < 0.01, "followers_count": followers,
+                "friends_count": friends, "listed_count": rng.randint(0, 50),
+                "favourites_count": rng.randint(0, 10000), "statuses_count": rng.randint(1, self.max_timeline),
+                "created_at": (START_DATE - timedelta(days=rng.randint(1, 4000))).strftime(DATE_FORMAT),
+                "geo_enabled": False, "lang": None, "contributors_enabled": False,
+                "profile_background_color": "C0DEED", "profile_background_image_url_https": None,
+                "profile_background_tile": False, "profile_image_url_https": "https://pbs.twimg.com/x.jpg",
+                "profile_link_color": "1DA1F2", "profile_text_color": "333333",
+                "profile_use_background_image": True, "default_profile": rng.random() < 0.5,
+                "default_profile_image": rng.random() < 0.1}
+
+    def status(self, status_id, user_id, rng=None, extended=False, nested=True):
+
+        """
+        Returns the payload of a status
+        :param status_id: int
+        :param user_id: author id
+        :param rng: random generator, if None the firehose one
+        :param extended: if True the text is in full_text, as in the timeline requests
+        :param nested: if False the status cannot be a retweet or a quote
+        :return: dict
+        """
+
+        rng = self.rng if rng is None else rng
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 20))]
+        hashtags = [rng.choice(HASHTAGS) for _ in range(rng.randint(0, 3))]
+        mentions = [rng.randint(1, 10 ** 6) for _ in range(rng.randint(0, 2))]
+        symbols = [rng.choice(SYMBOLS)] if rng.random() < 0.02 else []
+        text = " ".join(words + ["#" + h for h in hashtags] + ["@user{}".format(m) for m in mentions])
+        entities = {"hashtags": [{"text": h, "indices": [0, 0]} for h in hashtags],
+                    "user_mentions": [{"screen_name": "user{}".format(m), "id": m, "indices": [0, 0]}
+                                      for m in mentions],
+                    "symbols": [{"text": s, "indices": [0, 0]} for s in symbols],
+                    "urls": []}
+        if rng.random() < self.p_media:
+            entities["media"] = [{"url": "https://t.co/{}".format(status_id), "type": "photo"}]
+        reply_to = rng.randint(1, 10 ** 6) if rng.random() < self.p_reply else None
+        created_at = START_DATE + timedelta(seconds=(status_id % 10 ** 9) // 1000)
+
+        data = {"id": status_id, "id_str": str(status_id), "created_at": created_at.strftime(DATE_FORMAT),
+                "full_text" if extended else "text": text, "lang": rng.choice(("en", "en", "en", "it", "es")),
+                "coordinates": None, "retweet_count": rng.randint(0, 100), "favorite_count": rng.randint(0, 100),
+                "source": "web", "truncated": False, "is_quote_status": False,
+                "in_reply_to_status_id": reply_to * 10 if reply_to is not None else None,
+                "in_reply_to_user_id": reply_to, "in_reply_to_screen_name":
+                    "user{}".format(reply_to) if reply_to is not None else None,
+                "user": self.user(user_id), "place": None, "entities": entities}
+        if nested:
+            if rng.random() < self.p_retweet:
+                data["retweeted_status"] = self.status(status_id + 1, rng.randint(1, 10 ** 6), rng, extended, False)
+            elif rng.random() < self.p_quote:
+                data["is_quote_status"] = True
+                data["quoted_status"] = self.status(status_id + 1, rng.randint(1, 10 ** 6), rng, extended, False)
+        return data
+
+    def next_user(self):
+
+        """ Returns the author id of the next streamed status """
+
+        if self._users and self.rng.random() < self.repeat:
+            return self._users[int(len(self._users) * self.rng.random() ** self.skew)]
+        user_id = self.rng.randint(1, 10 ** 9)
+        self._users.append(user_id)
+        return user_id
+
+    def next_payload(self):
+
+        """ Returns the raw json of the next streamed status """
+
+        self._next_status += 2
+        return json.dumps(self.status(self._next_status, self.next_user()))
+
+    def timeline(self, user_id):
+
+        """
+        Returns the ids of a user timeline, most recent first
+        :param user_id: int
+        :return: list of ints
+        """
+
+        n = self.user(user_id)["statuses_count"]
+        base = user_id * 10 ** 4
+        return [base + 2 * i for i in range(n, 0, -1)]
+
+
+class SyntheticAPI(object):
+
+    """ Local stand-in of the tweepy API, serving the users and the timelines of a SyntheticFirehose """
+
+    def __init__(self, firehose, latency=0.0):
+
+        """
+        SyntheticAPI constructor
+        :param firehose: SyntheticFirehose obj
+        :param latency: seconds waited by each request, simulating the network
+        """
+
+        self.firehose = firehose
+        self.latency = latency
+        self.parser = tweepy.parsers.ModelParser()
+        self.auth = None
+        self.n_requests = 0
+
+    def _request(self):
+        self.n_requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _user_id(screen_name=None, user_id=None, id=None):
+        if user_id is not None or id is not None:
+            return int(user_id if user_id is not None else id)
+        return int(str(screen_name)[len("user"):]) if str(screen_name).startswith("user") else int(screen_name)
+
+    def get_user(self, screen_name=None, user_id=None, id=None, **kwargs):
+        self._request()
+        return User.parse(self, self.firehose.user(self._user_id(screen_name, user_id, id)))
+
+    def user_timeline(self, screen_name=None, user_id=None, count=20, max_id=None, since_id=None,
+                      exclude_replies=False, include_rts=True, **kwargs):
+        self._request()
+        uid = self._user_id(screen_name, user_id)
+        statuses = []
+        for status_id in self.firehose.timeline(uid):
+            if len(statuses) >= count or (since_id is not None and status_id <= since_id):
+                break
+            if max_id is not None and status_id > max_id:
+                continue
+            data = self.firehose.status(status_id, uid, rng=random.Random(status_id), extended=True)
+            if (exclude_replies and data["in_reply_to_status_id"] is not None) or \
+                    (not include_rts and "retweeted_status" in data):
+                continue
+            statuses.append(Status.parse(self, data))
+        return statuses
+
+
+class SyntheticStream(object):
+
+    """ Local stand-in of tweepy.Stream, pushing the firehose payloads into the listener at a given rate """
+
+    # set by the runner before streaming
+    firehose = None
+    rate = 0
+    latencies = None
+
+    def __init__(self, auth, listener, **kwargs):
+        self.listener = listener
+
+    def filter(self, **kwargs):
+        self.listener.on_connect()
+        start = time.perf_counter()
+        n = 0
+        while True:
+            if self.rate:
+                delay = start + n / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            payload = self.firehose.next_payload()
+            t = time.perf_counter()
+            result = self.listener.on_data(payload)
+            self.latencies.append(time.perf_counter() - t)
+            n += 1
+            if result is False:
+                return
+
+
+def rss_mb():
+
+    """ Returns the current resident memory in MB, the peak one where not available """
+
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def percentile(values, q):
+
+    """
+    Returns the q-th percentile of some values, nearest rank
+    :param values: sorted list
+    :param q: percentile in [0, 100]
+    """
+
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+
+class Reporter(object):
+
+    """ Samples throughput, latency and memory of the running streamer at regular intervals """
+
+    def __init__(self, streamer, api, latencies, json_path, interval):
+        self.streamer = streamer
+        self.api = api
+        self.latencies = latencies
+        self.json_path = json_path
+        self.interval = interval
+        self.samples = []
+        self._start = time.perf_counter()
+        self._last = (self._start, 0)
+
+    def sample(self, force=False):
+
+        """
+        Record a sample if the interval is elapsed
+        :param force: if True record it anyway
+        """
+
+        now = time.perf_counter()
+        last_time, last_n = self._last
+        if not force and now - last_time < self.interval:
+            return
+        n = len(self.latencies)
+        window = sorted(self.latencies[last_n:n])
+        sample = {"elapsed": round(now - self._start, 2),
+                  "statuses": n,
+                  "throughput": round((n - last_n) / max(now - last_time, 1e-9), 1),
+                  "p50_ms": round(percentile(window, 50) * 1000, 3),
+                  "p95_ms": round(percentile(window, 95) * 1000, 3),
+                  "p99_ms": round(percentile(window, 99) * 1000, 3),
+                  "max_ms": round(window[-1] * 1000, 3) if window else 0.0,
+                  "rss_mb": round(rss_mb(), 1),
+                  "file_mb": round(os.path.getsize(self.json_path) / 2 ** 20, 2)
+                  if os.path.exists(self.json_path) else 0.0,
+                  "accounts": self.streamer.collector.count,
+                  "requests": self.api.n_requests}
+        self.samples.append(sample)
+        self._last = (now, n)
+        print("{elapsed:>9.1f}s {statuses:>9} {throughput:>9.1f}/s  p50 {p50_ms:>8.3f}  p95 {p95_ms:>8.3f}  "
+              "p99 {p99_ms:>8.3f}  max {max_ms:>9.3f} ms  rss {rss_mb:>7.1f} MB  file {file_mb:>7.2f} MB  "
+              "accounts {accounts:>7}  requests {requests:>8}".format(**sample))
+        sys.stdout.flush()
+
+
+def run(args):
+
+    """
+    Run the soak test
+    :param args: parsed arguments
+    :return: dict report
+    """
+
+    firehose = SyntheticFirehose(seed=args.seed, repeat=args.repeat, p_retweet=args.p_retweet,
+                                 p_quote=args.p_quote, p_media=args.p_media, max_timeline=args.max_timeline)
+    api = SyntheticAPI(firehose, latency=args.api_latency)
+    statuses_collector = StatusCollector(api=api, verbose=False) if args.statuses else None
+    collector = AccountCollector(api=api, statuses_collector=statuses_collector, verbose=False)
+    admission = AdmissionController(buffer=FifoBuffer(size=args.admission)) if args.admission else None
+
+    work_dir = tempfile.mkdtemp(prefix="ptdc_soak_")
+    json_path = os.path.join(work_dir, "streaming.json")
+    streamer = OnlineStreamer(api=api,
+                              collector=collector,
+                              n_statuses=args.n_statuses,
+                              time_limit=args.duration,
+                              json_path=json_path,
+                              backup_path=os.path.join(work_dir, "backup.csv"),
+                              backup=args.backup,
+                              unique_users=args.unique,
+                              admission=admission,
+                              verbose=False)
+
+    latencies = []
+    reporter = Reporter(streamer, api, latencies, json_path, args.interval)
+    SyntheticStream.firehose, SyntheticStream.rate, SyntheticStream.latencies = firehose, args.rate, latencies
+
+    # the reporter samples from the listener, so that no thread competes with the streaming
+    on_data = streamer.on_data
+
+    def on_data_sampled(raw_data):
+        result = on_data(raw_data)
+        reporter.sample()
+        return result
+
+    streamer.on_data = on_data_sampled
+    with mock.patch("tweepy.Stream", SyntheticStream):
+        streamer.stream(track=["soak"])
+    reporter.sample(force=True)
+
+    samples = reporter.samples
+    ordered = sorted(latencies)
+    # the memory growth is measured after the first sample, so that the imports and the warmup are excluded
+    return {"statuses": len(latencies),
+            "elapsed": samples[-1]["elapsed"],
+            "throughput": round(len(latencies) / max(samples[-1]["elapsed"], 1e-9), 1),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+            "rss_growth_mb": round(samples[-1]["rss_mb"] - samples[0]["rss_mb"], 1),
+            "accounts": collector.count,
+            "requests": api.n_requests,
+            "samples": samples}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=int, default=60, help="seconds of streaming")
+    parser.add_argument("--rate", type=float, default=0, help="statuses per second, 0 as fast as possible")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=float, default=0.5, help="probability of a repeated user")
+    parser.add_argument("--p-retweet", type=float, default=0.3)
+    parser.add_argument("--p-quote", type=float, default=0.1)
+    parser.add_argument("--p-media", type=float, default=0.2)
+    parser.add_argument("--max-timeline", type=int, default=400, help="maximum statuses of a user timeline")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds waited by each api request")
+    parser.add_argument("--n-statuses", type=int, default=50, help="statuses collected for each streamed user")
+    parser.add_argument("--statuses", action="store_true", help="store the statuses too")
+    parser.add_argument("--unique", action="store_true", help="collect each user once")
+    parser.add_argument("--admission", type=int, default=0, help="admission buffer size, 0 collects synchronously")
+    parser.add_argument("--backup", type=int, default=None, help="seconds between backups")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="gate on the overall p99 latency")
+    parser.add_argument("--min-throughput", type=float, default=None, help="gate on the overall statuses/s")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=None, help="gate on the memory growth")
+    parser.add_argument("--json", default=None, help="report file's path")
+    args = parser.parse_args()
+
+    report = run(args)
+    print("{statuses} statuses in {elapsed}s, {throughput}/s, p50 {p50_ms} ms, p95 {p95_ms} ms, p99 {p99_ms} ms, "
+          "max {max_ms} ms, rss growth {rss_growth_mb} MB, {accounts} accounts, {requests} requests".format(**report))
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    failures = []
+    if args.max_p99_ms is not None and report["p99_ms"] > args.max_p99_ms:
+        failures.append("p99 {} ms over {} ms".format(report["p99_ms"], args.max_p99_ms))
+    if args.min_throughput is not None and report["throughput"] < args.min_throughput:
+        failures.append("throughput {}/s under {}/s".format(report["throughput"], args.min_throughput))
+    if args.max_rss_growth_mb is not None and report["rss_growth_mb"] > args.max_rss_growth_mb:
+        failures.append("rss growth {} MB over {} MB".format(report["rss_growth_mb"], args.max_rss_growth_mb))
+    for failure in failures:
+        print("FAILED: {}".format(failure))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
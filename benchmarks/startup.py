@@ -0,0 +1,67 @@
+"""
+Startup benchmark, measures the cold start of the package and of the ptdc command,
+each one in a fresh interpreter, and fails if the median exceeds the given budget.
+
+usage: python benchmarks/startup.py [--runs 10] [--budget 0.25]
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {"import ptdc": "import ptdc",
+         "ptdc --version": "import sys; sys.argv = ['ptdc', '--version']; from ptdc.cli import main; main()",
+         "import ptdc + collector": "import ptdc; ptdc.AccountCollector"}
+
+# repository root, the cases import ptdc from the checkout without installing it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cases that must stay within the budget, the last one pays the heavy imports on purpose
+GATED = ("import ptdc", "ptdc --version")
+
+
+def measure(code, runs):
+
+    """
+    Measure the wall time of running some code in fresh interpreters
+    :param code: python code
+    :param runs: number of runs
+    :return: list of seconds
+    """
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], stdout=subprocess.DEVNULL, cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.25, help="median seconds allowed for the gated cases")
+    args = parser.parse_args()
+
+    baseline = statistics.median(measure("pass", args.runs))
+    print("{:<28}{:>10.1f} ms".format("python (baseline)", baseline * 1000))
+
+    failed = False
+    for name, code in CASES.items():
+        median = statistics.median(measure(code, args.runs))
+        gated = name in GATED
+        over = gated and median > args.budget
+        failed = failed or over
+        print("{:<28}{:>10.1f} ms{}".format(name, median * 1000, "  OVER BUDGET" if over else ""))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,39 @@
 """
 Python Twitter Data Collector library initialization
 
+Public names are imported lazily, on first access, so that importing the package (e.g. by the ptdc command line)
+does not pay the import cost of pandas, numpy and tweepy until a collector or a streamer is actually used.
+
 :copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
 :license: MIT, see LICENSE for more details.
 """
-import logging
-
-from ptdc.collector import Collector, AccountCollector, StatusCollector, default_statuses_features, \
-    default_account_timeline_features, default_account_features
-from ptdc.streamer import OnlineStreamer
-from ptdc.support import authenticate
+import importlib
 
 __version__ = '1.3.6'
 __author__ = 'Andrea Lamparelli'
 __license__ = "MIT"
 
+# public name -> module defining it
+_LAZY_IMPORTS = {
+    'AccountCollector': 'ptdc.collector',
+    'StatusCollector': 'ptdc.collector',
+    'Collector': 'ptdc.collector',
+    'default_account_timeline_features': 'ptdc.collector',
+    'default_statuses_features': 'ptdc.collector',
+    'default_account_features': 'ptdc.collector',
+    'EntityTables': 'ptdc.entities',
+    'InteractionGraph': 'ptdc.graph',
+    'NearDuplicateIndex': 'ptdc.dedup',
+    'OnlineStreamer': 'ptdc.streamer',
+    'SnowballCrawler': 'ptdc.crawler',
+    'RetryPolicy': 'ptdc.retry',
+    'ShardedCollector': 'ptdc.sharding',
+    'SnapshotStore': 'ptdc.snapshot',
+    'SQLiteStore': 'ptdc.storage',
+    'TrendCounter': 'ptdc.trends',
+    'authenticate': 'ptdc.support',
+}
+
 __all__ = [
     'AccountCollector',
     'StatusCollector',
@@ -22,9 +41,35 @@ __all__ = [
     'default_account_timeline_features',
     'default_statuses_features',
     'default_account_features',
+    'EntityTables',
+    'InteractionGraph',
+    'NearDuplicateIndex',
     'OnlineStreamer',
+    'SnowballCrawler',
+    'RetryPolicy',
+    'ShardedCollector',
+    'SnapshotStore',
+    'SQLiteStore',
+    'TrendCounter',
     'authenticate',
     '__version__'
 ]
 
-logging.basicConfig(level=logging.WARNING, format='%(levelname)s:%(module)s:%(message)s')
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        # submodules not imported yet, e.g. ptdc.support
+        try:
+            return importlib.import_module("ptdc." + name)
+        except ModuleNotFoundError as e:
+            if e.name != "ptdc." + name:
+                raise
+            raise AttributeError("module 'ptdc' has no attribute '{}'".format(name)) from None
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    # cache it, next accesses do not pass through here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
@@ -0,0 +1,12 @@
+"""
+Allows running the ptdc command as python -m ptdc
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import sys
+
+from ptdc.cli import main
+
+sys.exit(main())
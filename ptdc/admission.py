@@ -0,0 +1,329 @@
+"""
+Admission module, it contains the classes used by the OnlineStreamer for deciding which streamed users
+get collected when the collection falls behind the stream.
+Policies -> decide, on arrival, whether a streamed user is a candidate for collection
+            UniformSampling, UserRateCap, PriorityThreshold
+Buffers -> hold the candidates waiting for the collector, deciding which one to drop when full
+           FifoBuffer, ReservoirBuffer, PriorityBuffer
+AdmissionController -> combines policies and buffer, counting admitted and dropped users
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class UniformSampling(object):
+
+    """ Admits each status with the same probability """
+
+    def __init__(self, rate):
+
+        """
+        UniformSampling constructor
+        :param rate: probability of admitting a status, in [0, 1]
+        """
+
+        self.rate = rate
+
+    def __call__(self, status):
+        return random.random() < self.rate
+
+
+class UserRateCap(object):
+
+    """ Admits a user at most max_count times every window seconds """
+
+    def __init__(self, max_count=1, window=3600, max_users=10 ** 6):
+
+        """
+        UserRateCap constructor
+        :param max_count: maximum admissions of the same user within a window
+        :param window: window length in seconds
+        :param max_users: maximum number of users tracked, the least recently admitted are forgotten first
+        """
+
+        self.max_count = max_count
+        self.window = window
+        self.max_users = max_users
+        # user id -> (window start, admissions), least recently admitted first
+        self._users = OrderedDict()
+
+    def __call__(self, status):
+        now = time.time()
+        user_id = status.user.id
+        start, count = self._users.pop(user_id, (now, 0))
+        if now - start > self.window:
+            start, count = now, 0
+        admitted = count < self.max_count
+        self._users[user_id] = (start, count + 1 if admitted else count)
+        if len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return admitted
+
+
+class PriorityThreshold(object):
+
+    """ Admits the statuses whose priority is at least a threshold """
+
+    def __init__(self, priority, threshold):
+
+        """
+        PriorityThreshold constructor
+        :param priority: priority function, Status --> float, for instance lambda s: s.user.followers_count
+        :param threshold: minimum priority admitted
+        """
+
+        self.priority = priority
+        self.threshold = threshold
+
+    def __call__(self, status):
+        return self.priority(status) >= self.threshold
+
+
+class FifoBuffer(object):
+
+    """ First in first out buffer, new candidates are dropped when full """
+
+    def __init__(self, size=1000):
+        self.size = size
+        self._items = deque()
+
+    def __len__(self):
+        return len(self._items)
+
+    def push(self, item, status):
+
+        """
+        Add a candidate
+        :param item: candidate to buffer
+        :param status: status the candidate comes from, None if unknown
+        :return: number of candidates dropped, 0 or 1
+        """
+
+        if len(self._items) >= self.size:
+            return 1
+        self._items.append(item)
+        return 0
+
+    def pop(self):
+
+        """ Remove and return the next candidate """
+
+        return self._items.popleft()
+
+    def items(self):
+
+        """ Returns the buffered candidates """
+
+        return list(self._items)
+
+
+class ReservoirBuffer(FifoBuffer):
+
+    """ Keeps a uniform sample of all the candidates arrived while the buffer was not empty """
+
+    def __init__(self, size=1000):
+        super(ReservoirBuffer, self).__init__(size=size)
+        self._seen = 0
+
+    def push(self, item, status):
+
+        """ Overrided method, see super class doc """
+
+        if not self._items:
+            self._seen = 0
+        self._seen += 1
+        if len(self._items) < self.size:
+            self._items.append(item)
+            return 0
+        j = random.randrange(self._seen)
+        if j < self.size:
+            self._items[j] = item
+        return 1
+
+
+class PriorityBuffer(FifoBuffer):
+
+    """ Keeps the highest priority candidates, the lowest one is dropped when full """
+
+    def __init__(self, priority, size=1000):
+
+        """
+        PriorityBuffer constructor
+        :param priority: priority function, Status --> float, for instance lambda s: s.user.followers_count
+        :param size: maximum number of candidates
+        """
+
+        super(PriorityBuffer, self).__init__(size=size)
+        self.priority = priority
+        # the same candidates in two heaps, so that both the lowest and the highest priority are found in O(log n):
+        # min-heap of (priority, -arrival, item), the lowest priority is dropped first
+        self._items = []
+        # min-heap of (-priority, arrival, item), the highest priority is collected first
+        self._best = []
+        # arrivals of the buffered candidates, entries removed from one heap are lazily skipped in the other one
+        self._live = set()
+        self._arrival = 0
+
+    def __len__(self):
+        return len(self._live)
+
+    def push(self, item, status):
+
+        """ Overrided method, see super class doc """
+
+        self._arrival += 1
+        # candidates restored without their status come first
+        priority = float("inf") if status is None else self.priority(status)
+        entry = (priority, -self._arrival, item)
+        if len(self._live) < self.size:
+            self._add(entry)
+            return 0
+        self._prune(self._items, lambda e: -e[1])
+        if entry > self._items[0]:
+            self._live.discard(-heapq.heappop(self._items)[1])
+            self._add(entry)
+        return 1
+
+    def pop(self):
+
+        """ Remove and return the highest priority candidate """
+
+        self._prune(self._best, lambda e: e[1])
+        entry = heapq.heappop(self._best)
+        self._live.discard(entry[1])
+        return entry[2]
+
+    def items(self):
+
+        """ Overrided method, see super class doc """
+
+        return [entry[2] for entry in sorted(e for e in self._best if e[1] in self._live)]
+
+    def _add(self, entry):
+
+        """
+        Add a candidate to both heaps
+        :param entry: tuple (priority, -arrival, item)
+        """
+
+        priority, arrival, item = entry[0], -entry[1], entry[2]
+        heapq.heappush(self._items, entry)
+        heapq.heappush(self._best, (-priority, arrival, item))
+        self._live.add(arrival)
+        if len(self._items) + len(self._best) > 4 * len(self._live) + 64:
+            self._compact()
+
+    def _prune(self, heap, arrival):
+
+        """
+        Pop from the top of a heap the candidates already removed through the other heap
+        :param heap: one of the two heaps
+        :param arrival: function entry --> arrival
+        """
+
+        while heap and arrival(heap[0]) not in self._live:
+            heapq.heappop(heap)
+
+    def _compact(self):
+
+        """ Drop the removed candidates from both heaps, so that their size stays proportional to the buffer """
+
+        self._items = [e for e in self._items if -e[1] in self._live]
+        self._best = [e for e in self._best if e[1] in self._live]
+        heapq.heapify(self._items)
+        heapq.heapify(self._best)
+
+
+class AdmissionController(object):
+
+    """ Admission control of the streamed users, thread safe """
+
+    def __init__(self, policies=None, buffer=None):
+
+        """
+        AdmissionController constructor
+        :param policies: list of policies, Status --> Bool, a status is a candidate if all of them admit it
+        :param buffer: buffer of the candidates waiting for collection, default FifoBuffer
+        """
+
+        self.policies = [] if policies is None else list(policies)
+        self.buffer = FifoBuffer() if buffer is None else buffer
+        self._condition = threading.Condition()
+
+        self.offered = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def offer(self, status):
+
+        """
+        Offer a streamed status, its user is buffered for collection if admitted by all the policies
+        :param status: tweepy Status obj
+        :return: True if the status has been admitted by the policies, its user may be dropped later by the buffer
+        """
+
+        with self._condition:
+            self.offered += 1
+            if not all(policy(status) for policy in self.policies):
+                self.rejected += 1
+                return False
+            dropped = self.buffer.push((status.user.id, status.user.screen_name), status)
+            self.dropped += dropped
+            self._condition.notify()
+            return True
+
+    def push(self, user_id, screen_name):
+
+        """
+        Buffer a user bypassing the policies, used for restoring the pending users of a checkpoint
+        :param user_id: user id
+        :param screen_name: user screen_name
+        """
+
+        with self._condition:
+            self.dropped += self.buffer.push((user_id, screen_name), None)
+            self._condition.notify()
+
+    def take(self, timeout=None):
+
+        """
+        Remove the next user to collect, waiting for it if the buffer is empty
+        :param timeout: maximum seconds to wait, if None waits forever
+        :return: tuple (user_id, screen_name) or None if the timeout expired
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self.buffer) > 0, timeout=timeout):
+                return None
+            self.admitted += 1
+            return self.buffer.pop()
+
+    def pending(self):
+
+        """ Returns the users waiting for collection, as tuples (user_id, screen_name) """
+
+        with self._condition:
+            return self.buffer.items()
+
+    def stats(self):
+
+        """
+        Returns the admission statistics
+        :return: dict with offered, admitted (taken for collection), rejected (by the policies),
+                 dropped (by the buffer) and pending users
+        """
+
+        with self._condition:
+            return {"offered": self.offered,
+                    "admitted": self.admitted,
+                    "rejected": self.rejected,
+                    "dropped": self.dropped,
+                    "pending": len(self.buffer)}
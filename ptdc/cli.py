@@ -0,0 +1,209 @@
+"""
+Command line module, it contains the entry point of the ptdc command.
+ptdc stream -> streams on some topics collecting the streamed users, @see OnlineStreamer
+ptdc collect -> collects the given accounts
+ptdc search -> searches users by names and collects them
+ptdc replay -> re-runs the collection over the users of a file written by a previous streaming
+
+All the subcommands are driven by a json config file, for instance:
+{
+    "credentials": {"consumer_key": "...", "consumer_key_secret": "...",
+                    "access_token": "...", "access_token_secret": "..."},
+    "collector": {"statuses": true, "n_statuses": 200},
+    "stream": {"track": ["photo", "holiday"], "data_limit": 100, "backup": 60, "checkpoint_path": "./stream.ckpt"},
+    "output": "./accounts.csv"
+}
+
+Heavy dependencies are imported only by the subcommands that need them, so that light commands start fast.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import sys
+
+from ptdc import __version__
+
+# options of the 'stream' config section passed to OnlineStreamer.stream, the other ones go to its constructor
+STREAM_FILTER_OPTIONS = ("follow", "track", "locations", "stall_warnings", "languages", "encoding", "filter_level")
+
+
+def load_config(path):
+
+    """
+    Load the json config file
+    :param path: config file's path, if None an empty config is returned
+    :return: config dict
+    """
+
+    if path is None:
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def build_collector(config):
+
+    """
+    Build the api and the collector described by the config
+    :param config: config dict
+    :return: AccountCollector obj
+    """
+
+    from ptdc.collector import AccountCollector, StatusCollector
+    from ptdc.support import authenticate
+
+    api = authenticate(**config["credentials"])
+    options = config.get("collector", {})
+    statuses_collector = StatusCollector(api=api, prefetch=options.get("prefetch", False)) \
+        if options.get("statuses", False) else None
+    return AccountCollector(api=api, statuses_collector=statuses_collector)
+
+
+def read_streamed_users(path):
+
+    """
+    Read the users of a file written by a streaming, one raw json status per line
+    :param path: streaming file's path
+    :return: generator of tuples (user_id, screen_name)
+    """
+
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logging.warning("Skipping malformed line..")
+                continue
+            if "user" in data:
+                yield data["user"]["id"], data["user"]["screen_name"]
+
+
+def stream(args, config):
+
+    """ stream subcommand """
+
+    from ptdc.streamer import OnlineStreamer
+
+    options = dict(config.get("stream", {}))
+    filter_options = {name: options.pop(name) for name in STREAM_FILTER_OPTIONS if name in options}
+    accepted = set(inspect.signature(OnlineStreamer.__init__).parameters) - {"self", "api", "collector", "n_statuses"}
+    unknown = sorted(set(options) - accepted)
+    if unknown:
+        raise ValueError("Unknown 'stream' config options: {}, allowed: {}".format(
+            ", ".join(unknown), ", ".join(sorted(accepted | set(STREAM_FILTER_OPTIONS)))))
+
+    collector = build_collector(config)
+    streamer = OnlineStreamer(api=collector.api,
+                              collector=collector,
+                              n_statuses=config.get("collector", {}).get("n_statuses", 0),
+                              **options)
+    if args.resume:
+        streamer.resume()
+    streamer.stream(**filter_options)
+    collector.save_dataset(path=args.output or config["output"])
+
+
+def collect(args, config):
+
+    """ collect subcommand """
+
+    collector = build_collector(config)
+    n_statuses = config.get("collector", {}).get("n_statuses", 0)
+    for screen_name in args.accounts or config.get("accounts", []):
+        collector.collect_account(screen_name=screen_name, n_statuses=n_statuses)
+    collector.save_dataset(path=args.output or config["output"])
+
+
+def search(args, config):
+
+    """ search subcommand """
+
+    collector = build_collector(config)
+    collector.collect_users_by_names(names=args.names or config.get("names", []),
+                                     count=args.count,
+                                     n_statuses=config.get("collector", {}).get("n_statuses", 0))
+    collector.save_dataset(path=args.output or config["output"])
+
+
+def replay(args, config):
+
+    """ replay subcommand """
+
+    if args.dry_run:
+        # no collection, the streamed file is only scanned
+        users = set()
+        n_statuses = 0
+        for user_id, _ in read_streamed_users(args.path):
+            users.add(user_id)
+            n_statuses += 1
+        print("{} statuses, {} distinct users".format(n_statuses, len(users)))
+        return
+
+    collector = build_collector(config)
+    n_statuses = config.get("collector", {}).get("n_statuses", 0)
+    processed = set()
+    for user_id, screen_name in read_streamed_users(args.path):
+        if args.unique and user_id in processed:
+            continue
+        processed.add(user_id)
+        collector.process(screen_name=screen_name, n_statuses=n_statuses)
+    collector.save_dataset(path=args.output or config["output"])
+
+
+def build_parser():
+
+    """ Returns the argument parser of the ptdc command """
+
+    parser = argparse.ArgumentParser(prog="ptdc", description="Python Twitter Data Collector")
+    parser.add_argument("--version", action="version", version="%(prog)s {}".format(__version__))
+    parser.add_argument("-c", "--config", help="json config file")
+    parser.add_argument("-o", "--output", help="dataset file's path, overrides the config 'output'")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    stream_parser = subparsers.add_parser("stream", help="stream and collect the streamed users")
+    stream_parser.add_argument("--resume", action="store_true", help="resume from the config 'checkpoint_path'")
+    stream_parser.set_defaults(func=stream)
+
+    collect_parser = subparsers.add_parser("collect", help="collect the given accounts")
+    collect_parser.add_argument("accounts", nargs="*", help="screen_names or ids, overrides the config 'accounts'")
+    collect_parser.set_defaults(func=collect)
+
+    search_parser = subparsers.add_parser("search", help="search users by names and collect them")
+    search_parser.add_argument("names", nargs="*", help="query names, overrides the config 'names'")
+    search_parser.add_argument("-n", "--count", type=int, default=20, help="users to collect for each name")
+    search_parser.set_defaults(func=search)
+
+    replay_parser = subparsers.add_parser("replay", help="collect the users of a streaming file")
+    replay_parser.add_argument("path", help="streaming file's path, one raw json status per line")
+    replay_parser.add_argument("--unique", action="store_true", help="collect each user once")
+    replay_parser.add_argument("--dry-run", action="store_true", help="only count statuses and users")
+    replay_parser.set_defaults(func=replay)
+
+    return parser
+
+
+def main(argv=None):
+
+    """
+    Entry point of the ptdc command
+    :param argv: command line arguments, if None sys.argv is used
+    """
+
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(levelname)s:%(module)s:%(message)s')
+    args.func(args, load_config(args.config))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,14 +10,19 @@ the data into Pandas DataFrame.
 
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import reduce
 
 import numpy as np
 import pandas as pd
 import tweepy
 
+from ptdc.entities import EntityTables
+from ptdc.filters import as_filter
+from ptdc.retry import AccountError, RetryPolicy, SUSPENDED
+from ptdc.storage import FrameStore
 from ptdc.support import get_attribute, get_retweeted_user_id, get_retweeted_status, get_quoted_user_id, get_media, \
-    get_country, get_place_type, get_time, get_timestamp
+    get_country, get_place_type, get_time, get_timestamp, prefetch_iterator, get_mentioned_user_ids
 
 default_account_features = {"id": get_attribute,
                             "name": get_attribute,
@@ -48,6 +53,7 @@ default_account_features = {"id": get_attribute,
                             "default_profile_image": get_attribute,
                             "profile_crawled": lambda x, y: get_time(),
                             "is_suspended": lambda x, y: 0,
+                            "collection_error": lambda x, y: None,
                             "following_followers_ratio": lambda user, _: user.friends_count / user.followers_count if user.followers_count != 0 else None,
                             "followers_following_ratio": lambda user, _: user.followers_count / user.friends_count if user.friends_count != 0 else None}
 
@@ -57,6 +63,7 @@ default_account_timeline_features = {"n_statuses_collected": lambda statuses_dat
                                      "media_shared_urls": lambda statuses_data, _: reduce(lambda x,y: x+y, [], [x for x in statuses_data["media_urls"] if x is not None]),
                                      "mean_shared_media": lambda statuses_data, _: (len(reduce(lambda x,y: x+y, [], [x for x in statuses_data["media_urls"] if x is not None])) / statuses_data.shape[0]) if statuses_data.shape[0] != 0 else None,
                                      "quoted_user_ids": lambda statuses_data, _: [x for x in statuses_data["quoted_user_id"] if x is not None],
+                                     "mentioned_user_ids": lambda statuses_data, _: [x for ids in statuses_data["mentioned_user_ids"] if ids is not None for x in ids],
                                      "replied_status_ids": lambda statuses_data, _: [x for x in statuses_data["in_reply_to_status_id"] if x is not None],
                                      "replied_user_ids": lambda statuses_data, _: [x for x in statuses_data["in_reply_to_user_id"] if x is not None],
                                      "retweeted_status_ids": lambda statuses_data, _: [x for x in statuses_data["retweeted_status"] if x is not None],
@@ -80,6 +87,7 @@ default_statuses_features = {"id": get_attribute,
                              "text_length": lambda status, _: len(status.full_text),
                              "hashtags": lambda status, feature: [ht["text"] for ht in status.entities[feature]],
                              "user_mentions": lambda status, feature: [user["screen_name"] for user in status.entities[feature]],
+                             "mentioned_user_ids": lambda status, _: get_mentioned_user_ids(status),
                              "symbols": lambda status, feature: status.entities[feature],
                              "media_urls": lambda status, _: get_media(status),
                              "quoted_user_id": lambda status, _: get_quoted_user_id(status),
@@ -95,23 +103,43 @@ class Collector(ABC):
 
     MAX_STATUSES = 3200  # maximum number of statuses that can be collected from a single account
 
-    def __init__(self, api, verbose=True):
+    def __init__(self, api, storage=None, verbose=True):
         super(Collector, self).__init__()
         self.api = api
         self._verbose = verbose
-        self._dataset = None
+        self._storage = storage
+        self._store = None
         self.count = 0
-        self.verboseprint = print if self._verbose else lambda *args: None
+        self.verboseprint = print if self._verbose else lambda *args, **kwargs: None
+        # function called after each timeline page collected, @see set_page_hook
+        self._page_hook = None
 
     def dataset(self):
-        return self._dataset
+        return self._store.frame()
+
+    def set_page_hook(self, hook):
+
+        """
+        Set the function called after each timeline page collected, once the partial timeline of the account
+        (@see get_state) holds the page, so that a checkpoint saved by the hook loses no page already requested
+        :param hook: function taking the screen_name of the account, None to remove it
+        """
+
+        self._page_hook = hook
+
+    def store(self):
+
+        """ Returns the storage holding the dataset, @see FrameStore and SQLiteStore """
+
+        return self._store
 
     @abstractmethod
     def process(self,
                 screen_name,
                 n_statuses,
                 filter_account=lambda x: True,
-                filter_status=lambda x: True):
+                filter_status=lambda x: True,
+                user_id=None):
 
         """
         Method called by the OnlineStreamer used for collecting data online,
@@ -121,28 +149,52 @@ class Collector(ABC):
         :param n_statuses: number of statuses to be collected for that user
         :param filter_account: filtering function for users
         :param filter_status: filtering function for statuses
+        :param user_id: id of the user streamed, if known
         """
         pass
 
     def init_dataset(self, features):
 
         """
-        Create the empty dataframe
+        Create the empty dataset storage
         :param features: features  numpy array
         """
 
         logging.debug("Initializing DataFrame..")
 
-        self._dataset = pd.DataFrame(columns=features)
+        self._store = FrameStore(columns=features) if self._storage is None else self._storage.init_columns(features)
 
     def update_dataset(self, data):
 
         """
-        Update the current dataset with new raw_data
-        :param data: pandas Series data to add in the df
+        Update the current dataset with new raw_data, the data already stored is never copied
+        :param data: pandas Series data to add in the df, or a DataFrame chunk stored as it is
         """
 
-        self._dataset = self._dataset.append(data, ignore_index=True)
+        self._store.append(data)
+
+    def get_state(self):
+
+        """
+        Returns the collection state, used by checkpoints
+        :return: picklable dict
+        """
+
+        # persistent stores already hold the data, they only need to be flushed
+        self._store.flush()
+        return {"dataset": None if self._store.persistent else self.dataset(), "count": self.count}
+
+    def set_state(self, state):
+
+        """
+        Restore a collection state previously returned by get_state
+        :param state: dict
+        """
+
+        if state["dataset"] is not None:
+            self._store.clear()
+            self._store.append(state["dataset"])
+        self.count = state["count"]
 
     def save_dataset(self, path, sep='\t'):
         """
@@ -151,7 +203,8 @@ class Collector(ABC):
         :param sep: separator used, default '\t'
         """
 
-        self._dataset.to_csv(path_or_buf=path, sep=sep, index=False)
+        self._store.flush()
+        self.dataset().to_csv(path_or_buf=path, sep=sep, index=False)
 
         self.verboseprint("Dataset successfully saved at {}.".format(path))
         logging.debug("Dataset saved at {}..".format(path))
@@ -161,11 +214,19 @@ class AccountCollector(Collector):
 
     """ Twitter's Accounts Data Collector """
 
+    QUERY_FEATURE = "query"  # feature tagging each account with the query it has been collected from
+    SUSPENDED_FEATURE = "is_suspended"  # feature set when the account turns out to be suspended
+    ERROR_FEATURE = "collection_error"  # feature recording why the account has not been completely collected
+
     def __init__(self,
                  api,
                  statuses_collector=None,
                  features=None,
                  timeline_features=None,
+                 snapshot_store=None,
+                 interaction_graph=None,
+                 storage=None,
+                 retry_policy=None,
                  verbose=True):
 
         """
@@ -175,9 +236,14 @@ class AccountCollector(Collector):
         :param features: account features dict -> <feature_name, func>, func takes user and feature name
         :param timeline_features: features related to the account timeline, dict <feature_name, func>,
                                   func takes timeline dataframe and feature name
+        :param snapshot_store: optional SnapshotStore where recording, as change-only deltas, every account collected
+        :param interaction_graph: optional InteractionGraph where adding the interactions read from timeline features
+        :param storage: optional persistent store of the accounts, for instance SQLiteStore(path, 'accounts'),
+                        if None the accounts are kept in memory
+        :param retry_policy: RetryPolicy of the requests, if None the one of statuses_collector or a default one
         """
 
-        super(AccountCollector, self).__init__(api=api, verbose=verbose)
+        super(AccountCollector, self).__init__(api=api, storage=storage, verbose=verbose)
 
         self._features = default_account_features if features is None else features
         self._timeline_features = default_account_timeline_features if timeline_features is None else timeline_features
@@ -185,6 +251,14 @@ class AccountCollector(Collector):
         self._all_features = np.array(np.concatenate((np.array(list(self._features.keys())), np.array(list(self._timeline_features.keys())))))
 
         self._statuses_collector = statuses_collector
+        if retry_policy is None:
+            retry_policy = statuses_collector.retry_policy if statuses_collector is not None else RetryPolicy()
+        self.retry_policy = retry_policy
+        # collector used for the timeline features, created once, the statuses are stored only by statuses_collector
+        self._timeline_collector = statuses_collector if statuses_collector is not None else \
+            StatusCollector(api=api, retry_policy=retry_policy, verbose=verbose)
+        self._snapshot_store = snapshot_store
+        self._interaction_graph = interaction_graph
 
         self.init_dataset(self._all_features)
 
@@ -202,11 +276,41 @@ class AccountCollector(Collector):
             self._statuses_collector.save_dataset(path=statuses_path, sep=sep)
         super(AccountCollector, self).save_dataset(path=path, sep=sep)
 
+    def get_state(self):
+
+        """ Overrided method, including the statuses collector state """
+
+        state = super(AccountCollector, self).get_state()
+        if self._statuses_collector is not None:
+            state["statuses_collector"] = self._statuses_collector.get_state()
+        else:
+            # it holds the partial timeline of the account being collected
+            state["timeline_collector"] = self._timeline_collector.get_state()
+        return state
+
+    def set_state(self, state):
+
+        """ Overrided method, including the statuses collector state """
+
+        super(AccountCollector, self).set_state(state)
+        if self._statuses_collector is not None and "statuses_collector" in state:
+            self._statuses_collector.set_state(state["statuses_collector"])
+        elif self._statuses_collector is None and "timeline_collector" in state:
+            self._timeline_collector.set_state(state["timeline_collector"])
+
+    def set_page_hook(self, hook):
+
+        """ Overrided method, the pages are collected by the timeline collector """
+
+        super(AccountCollector, self).set_page_hook(hook)
+        self._timeline_collector.set_page_hook(hook)
+
     def process(self,
                 screen_name,
                 n_statuses,
                 filter_account=lambda x: True,
-                filter_status=lambda x: True):
+                filter_status=lambda x: True,
+                user_id=None):
 
         """ Overrided method, see super class doc"""
 
@@ -226,14 +330,41 @@ class AccountCollector(Collector):
         :param n_statuses: number of account's statuses to collect
         :param filter_account: filtering function to apply to the Account obj
         :param filter_status: filtering function to apply to the Status obj
+        :return: pandas Series added to the dataset, None if the account has been skipped
         """
         self.verboseprint("Collecting account.", end='\r')
         logging.debug("Collecting account infos..")
-        account = self.api.get_user(screen_name)
+        try:
+            account = self.retry_policy.call(screen_name, lambda: self.api.get_user(screen_name))
+        except AccountError as e:
+            return self._collect_error(screen_name, e)
+        return self._collect_user(account=account,
+                                  n_statuses=n_statuses,
+                                  filter_account=filter_account,
+                                  filter_status=filter_status)
+
+    def _collect_user(self, account, n_statuses, filter_account, filter_status, query=None):
+
+        """
+        Collects an already retrieved account obj, adding its row to the dataset
+        :param account: tweepy User obj
+        :param n_statuses: number of account's statuses to collect
+        :param filter_account: filtering function to apply to the Account obj
+        :param filter_status: filtering function to apply to the Status obj
+        :param query: originating query of the account, if None the 'query' feature is left untouched
+        :return: pandas Series added to the dataset, None if the account has been skipped
+        """
+
+        raw_data = None
         if filter_account(account):
-            self.update_dataset(data=self._process_account(account=account,
-                                                           n_statuses=n_statuses,
-                                                           filter_status=filter_status))
+            raw_data = self._process_account(account=account, n_statuses=n_statuses, filter_status=filter_status)
+            if query is not None and self.QUERY_FEATURE in raw_data.index:
+                raw_data[self.QUERY_FEATURE] = query
+            self.update_dataset(data=raw_data)
+            if self._snapshot_store is not None:
+                self._snapshot_store.update(raw_data)
+            if self._interaction_graph is not None:
+                self._interaction_graph.add_account(raw_data)
         else:
             self.verboseprint("Account skipped..")
             logging.debug("Account skipped..")
@@ -242,24 +373,133 @@ class AccountCollector(Collector):
         if (self.count % 20) == 0:
             self.verboseprint("Collected {} accounts!".format(self.count))
 
-    def _process_account(self, account, n_statuses, filter_status):
+        return raw_data
+
+    def _collect_error(self, screen_name, error):
+
+        """
+        Record an account that could not be retrieved, a row holding only the error is added if the error
+        is permanent (for instance a suspended account), the account is skipped otherwise
+        :param screen_name: screen_name or id of the account
+        :param error: AccountError obj
+        :return: pandas Series added to the dataset, None if the account has been skipped
+        """
+
+        logging.warning(error)
+        self.count += 1
+        raw_data = self._error_row(screen_name, error)
+        if raw_data is not None:
+            self.update_dataset(data=raw_data)
+        return raw_data
+
+    def _error_row(self, screen_name, error):
+
+        """
+        Build the row of an account that could not be retrieved, @see _collect_error
+        :param screen_name: screen_name or id of the account
+        :param error: AccountError obj
+        :return: pandas Series holding only the account key and the error, None if the error is not permanent
+        """
+
+        if error.reason not in AccountError.PERMANENT or self.ERROR_FEATURE not in self._store.columns:
+            return None
+
+        raw_data = pd.Series([None] * len(self._store.columns), index=self._store.columns, dtype=object)
+        raw_data["id" if isinstance(screen_name, int) else "screen_name"] = screen_name
+        self._record_error(raw_data, error)
+        return raw_data
+
+    def _record_error(self, raw_data, error):
+
+        """
+        Record in an account row why the account has not been completely collected
+        :param raw_data: pandas Series of the account
+        :param error: AccountError obj
+        """
+
+        if self.ERROR_FEATURE in raw_data.index:
+            raw_data[self.ERROR_FEATURE] = error.reason
+        if error.reason == SUSPENDED and self.SUSPENDED_FEATURE in raw_data.index:
+            raw_data[self.SUSPENDED_FEATURE] = 1
+
+    def iter_accounts(self,
+                      screen_names,
+                      n_statuses,
+                      filter_account=lambda x: True,
+                      filter_status=lambda x: True):
+
+        """
+        Lazily collect accounts without storing them, neither their rows nor their statuses,
+        so that downstream consumers can process any number of accounts in bounded memory
+        :param screen_names: iterable of screen_names or ids of the accounts to retrieve
+        :param n_statuses: number of statuses to collect for each account, used by timeline features
+        :param filter_account: filtering function to apply to the Account obj
+        :param filter_status: filtering function to apply to the Status obj
+        :return: generator of pandas Series, one for each account satisfying the filtering function,
+                 plus an error-only row for each account permanently unavailable, @see collect_account
+        """
+
+        for screen_name in screen_names:
+            try:
+                account = self.retry_policy.call(screen_name, lambda: self.api.get_user(screen_name))
+            except AccountError as e:
+                logging.warning(e)
+                raw_data = self._error_row(screen_name, e)
+                if raw_data is not None:
+                    yield raw_data
+                continue
+            if filter_account(account):
+                yield self._process_account(account=account,
+                                            n_statuses=n_statuses,
+                                            filter_status=filter_status,
+                                            store=False)
+            else:
+                logging.debug("Account skipped..")
+
+    def _process_account(self, account, n_statuses, filter_status, store=True):
 
         """
         Retrieve all pre-defined features for the given account
         :param account: account for which get info
         :param n_statuses: number of statuses to collect for this account
+        :param store: if False the statuses collected are only used for timeline features, without storing them
         :return: pandas Series containing all information
         """
 
         account_data = [func(account, feature_name) for feature_name, func in self._features.items()]
+        error = None
         if self._timeline_features:
-            # creates a local default collector for retrieving timeline features
-            local_collector = self._statuses_collector if self._statuses_collector is not None else StatusCollector(api=self.api)
-            status_df = local_collector.collect_statuses(screen_name=account.screen_name, n_statuses=n_statuses, filter_status=filter_status)
+            if store and self._statuses_collector is not None:
+                # the timeline chunk is the one held by the shared statuses store, aggregates do not copy it
+                try:
+                    status_df = self._statuses_collector.collect_statuses(screen_name=account.screen_name, n_statuses=n_statuses, filter_status=filter_status)
+                except AccountError as e:
+                    status_df, error = e.statuses, e
+            elif store:
+                # the partial timeline is kept by the timeline collector, so that checkpoints hold it
+                try:
+                    status_df = self._timeline_collector.collect_timeline(screen_name=account.screen_name,
+                                                                          n_statuses=n_statuses,
+                                                                          filter_status=filter_status)
+                except AccountError as e:
+                    status_df, error = e.statuses, e
+            else:
+                rows = []
+                try:
+                    rows.extend(self._timeline_collector.iter_statuses(screen_name=account.screen_name,
+                                                                       n_statuses=n_statuses,
+                                                                       filter_status=filter_status))
+                except AccountError as e:
+                    error = e
+                status_df = pd.DataFrame(rows, columns=self._timeline_collector.feature_names(), dtype=object)
+            # timeline features are computed on the statuses collected before any error
             status_data = [func(status_df, feature_name) for feature_name, func in self._timeline_features.items()]
             account_data = account_data + status_data
 
-        raw_data = pd.Series(account_data, index=self.dataset().columns)
+        raw_data = pd.Series(account_data, index=self._store.columns)
+        if error is not None:
+            logging.warning(error)
+            self._record_error(raw_data, error)
         return raw_data
 
     def collect_users_by_name(self,
@@ -279,115 +519,405 @@ class AccountCollector(Collector):
         :param exclude: optional, list of user's screen_name to exclude from collection
         """
 
-        exclude = [] if exclude is None else exclude
-        loaded_ids = []
-        query = 'query'
+        self.collect_users_by_names(names=[name],
+                                    count=count,
+                                    filter_account=filter_account,
+                                    filter_status=filter_status,
+                                    exclude=exclude)
+
+    def collect_users_by_names(self,
+                               names,
+                               count,
+                               n_statuses=0,
+                               filter_account=lambda x: True,
+                               filter_status=lambda x: True,
+                               exclude=None,
+                               max_workers=8):
 
-        self.verboseprint("Searching by {}..".format(name))
+        """
+        Make many query searches by name concurrently and collect, for each query, 'count' users
+        at most, extracting for each them the features passed in the constructor.
+        Users are deduplicated across all the queries and each row is tagged with its originating query
+        :param names: iterable of query names
+        :param count: number of user to keep for each query, at most
+        :param n_statuses: number of statuses to collect for each user, used by timeline features
+        :param filter_account: optional, account filtering function
+        :param filter_status: optional, statuses filtering function
+        :param exclude: optional, iterable of user's screen_name to exclude from collection
+        :param max_workers: maximum number of searches running at the same time
+        """
+
+        exclude = set() if exclude is None else set(exclude)
+        loaded_ids = set()
+        names = list(dict.fromkeys(names))
+
+        if not names:
+            return
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as executor:
+            futures = {executor.submit(self._search_users, name, count): name for name in names}
+            # searches run concurrently, users are processed on this thread as soon as a search completes
+            for future in as_completed(futures):
+                name = futures[future]
+                for user in future.result():
+                    if user.screen_name in exclude or user.id in loaded_ids:
+                        continue
+                    loaded_ids.add(user.id)
+                    self._collect_user(account=user,
+                                       n_statuses=n_statuses,
+                                       filter_account=filter_account,
+                                       filter_status=filter_status,
+                                       query=name)
+
+    def _search_users(self, name, count):
+
+        """
+        Search users by name
+        :param name: query name
+        :param count: number of users to retrieve, at most
+        :return: list of tweepy User obj, stopping as soon as the search starts returning already seen users
+        """
 
-        if query in self._features.keys():
-            self._features[query] = lambda x, y: name
+        self.verboseprint("Searching by {}..".format(name))
 
+        users = []
+        seen_ids = set()
         try:
             for user in tweepy.Cursor(self.api.search_users, q=name).items(count):
-                if user.screen_name not in exclude and user.id not in loaded_ids:
-                    loaded_ids.append(user.id)
-                    self.collect_account(user.screen_name, 0, filter_account, filter_status)
-                elif user.screen_name in loaded_ids:
-                    return
-        except tweepy.TweepError:
-            pass
+                if user.id in seen_ids:
+                    # search pages started to repeat themselves
+                    break
+                seen_ids.add(user.id)
+                users.append(user)
+        except tweepy.TweepError as e:
+            logging.warning(e)
+
+        return users
 
 
 class StatusCollector(Collector):
 
     """ Twitter's Statuses Data Collector """
 
+    PAGE_SIZE = 200  # maximum number of statuses returned by a single timeline request
+    PREFETCH_DEPTH = 2  # number of timeline pages fetched ahead of the processing, when prefetching
+    DUPLICATE_FEATURE = "duplicate_cluster"  # near-duplicate cluster of the status text, when deduplicating
+
     def __init__(self,
                  api,
                  features=None,
+                 prefetch=False,
+                 storage=None,
+                 retry_policy=None,
+                 entity_tables=None,
+                 dedup=None,
+                 drop_duplicates=False,
                  verbose=True):
-        super(StatusCollector, self).__init__(api=api, verbose=verbose)
+
+        """
+        Status Collector constructor
+        :param api: Tweepy API obj used for making query
+        :param features: statuses features dict -> <feature_name, func>, func takes status and feature name
+        :param prefetch: default pipelined mode of collect_statuses, see its doc
+        :param storage: optional persistent store of the statuses, for instance SQLiteStore(path, 'statuses'),
+                        if None the statuses are kept in memory
+        :param retry_policy: RetryPolicy bounding the retries of the timeline requests, if None a default one
+        :param entity_tables: optional EntityTables, or True for the default one, if given its list-valued fields
+                              (hashtags, user_mentions, symbols, media_urls) are stored as side tables
+                              (status_id, entity_id) with a shared dictionary instead of list cells of the dataset
+        :param dedup: optional NearDuplicateIndex consulted with the text of every status collected, the cluster
+                      of near-duplicates of each status is added as the duplicate_cluster feature
+        :param drop_duplicates: if True, and dedup is given, only the first status of each cluster is kept,
+                                the others are neither stored nor used by the account timeline features
+        """
+
+        super(StatusCollector, self).__init__(api=api, storage=storage, verbose=verbose)
 
         self._features = default_statuses_features if features is None else features
+        self._dedup = dedup
+        self._drop_duplicates = drop_duplicates and dedup is not None
+        self.n_dropped = 0
+        if dedup is not None:
+            self._features = dict(self._features)
+            self._features[self.DUPLICATE_FEATURE] = self._duplicate_cluster
+        self._prefetch = prefetch
+        self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self._entity_tables = EntityTables() if entity_tables is True else entity_tables
+        # partial timelines of the accounts being collected -> <screen_name, progress>
+        self._in_flight = {}
         self._all_features = np.array(list(self._features.keys()))
+        self._features_index = pd.Index(self._all_features)
+
+        # features moved into the entity side tables are not stored in the dataset
+        self._entity_features = [] if self._entity_tables is None else \
+            [f for f in self._entity_tables.fields if f in self._features]
+        stored_features = [f for f in self._all_features if f not in self._entity_features]
+        # columns of the timeline chunks, the stored ones first, so that the stored chunk is a view of them
+        self._chunk_features = stored_features + self._entity_features
+        self.init_dataset(features=stored_features)
+
+    def feature_names(self):
+
+        """ Returns the features of the rows produced for each status, entity fields included """
+
+        return self._features_index
+
+    def entity_tables(self):
 
-        self.init_dataset(features=self._all_features)
+        """ Returns the EntityTables holding the list-valued entities, None if not enabled """
+
+        return self._entity_tables
+
+    def save_dataset(self, path, sep='\t'):
+
+        """
+        Overrided method, saving also the entity side tables, if enabled, @see EntityTables.save
+        :param path: statuses file's path
+        :param sep: separator of csv
+        """
+
+        super(StatusCollector, self).save_dataset(path=path, sep=sep)
+        if self._entity_tables is not None:
+            self._entity_tables.save(path=path, sep=sep)
+
+    def get_state(self):
+
+        """ Overrided method, including the partial timelines of the accounts being collected and the dedup index """
+
+        state = super(StatusCollector, self).get_state()
+        state["in_flight"] = self._in_flight
+        state["entity_tables"] = self._entity_tables
+        state["dedup"] = self._dedup
+        state["n_dropped"] = self.n_dropped
+        return state
+
+    def set_state(self, state):
+
+        """ Overrided method, including the partial timelines of the accounts being collected and the dedup index """
+
+        super(StatusCollector, self).set_state(state)
+        self._in_flight = state.get("in_flight", {})
+        if state.get("entity_tables") is not None:
+            self._entity_tables = state["entity_tables"]
+        if state.get("dedup") is not None and self._dedup is not None:
+            # the clusters of the statuses collected before are kept, so that their duplicates are still detected
+            self._dedup = state["dedup"]
+            self.n_dropped = state.get("n_dropped", 0)
 
     def process(self,
                 screen_name,
                 n_statuses,
                 filter_account=lambda x: True,
-                filter_status=lambda x: True):
+                filter_status=lambda x: True,
+                user_id=None):
 
         """ Overrided method, see super class doc"""
 
-        self.collect_statuses(screen_name=screen_name,
-                              n_statuses=n_statuses,
-                              filter_status=filter_status)
+        try:
+            self.collect_statuses(screen_name=screen_name,
+                                  n_statuses=n_statuses,
+                                  filter_status=filter_status)
+        except AccountError as e:
+            logging.warning(e)
 
-    def collect_statuses(self, screen_name, n_statuses, filter_status=lambda x: True):
+    def collect_statuses(self, screen_name, n_statuses, filter_status=lambda x: True, prefetch=None):
 
         """
         Collect statuses from a specific account's timeline
         :param screen_name: screen name or id of the account
         :param n_statuses: number of statuses to collect for thus account
-        :param filter_status: filtering function to apply to Status obj
+        :param filter_status: filtering function to apply to Status obj, or a StatusFilter whose request
+                              parameters are pushed down into the timeline requests, @see ptdc.filters
+        :param prefetch: if True timeline pages are fetched by a background thread running ahead of the processing,
+                         so that each page is processed as soon as it arrives while the next one is downloaded,
+                         if None the collector default is used
         :return local DataFrame containing the statuses of this account
+        :raise AccountError: if the account has been given up, the statuses collected before are stored anyway
+                             and available as its statuses attribute
         """
 
-        n_statuses = Collector.MAX_STATUSES if n_statuses > Collector.MAX_STATUSES else n_statuses
+        error = None
+        try:
+            local_df = self.collect_timeline(screen_name=screen_name,
+                                             n_statuses=n_statuses,
+                                             filter_status=filter_status,
+                                             prefetch=prefetch)
+        except AccountError as e:
+            local_df, error = e.statuses, e
+
+        if self._entity_features:
+            # the returned chunk keeps the entity lists, used by the timeline features, the stored one does not
+            self._entity_tables.add_frame(local_df)
+            # a column slice of the single object block, not a copy
+            self.update_dataset(data=local_df.iloc[:, :len(self._store.columns)])
+        else:
+            self.update_dataset(data=local_df)
+
+        if error is not None:
+            raise error
+        return local_df
+
+    def collect_timeline(self, screen_name, n_statuses, filter_status=lambda x: True, prefetch=None):
+
+        """
+        Collect statuses from a specific account's timeline without storing them, the partial timeline
+        is checkpointed as the one of collect_statuses
+        :param screen_name: screen name or id of the account
+        :param n_statuses: number of statuses to collect for thus account
+        :param filter_status: filtering function to apply to Status obj, @see collect_statuses
+        :param prefetch: if True timeline pages are fetched ahead of the processing, @see collect_statuses
+        :return local DataFrame containing the statuses of this account, entity fields included
+        :raise AccountError: if the account has been given up, the statuses collected before are available
+                             as its statuses attribute
+        """
+
+        # the partial timeline is kept until the account is completed, so that an interrupted collection
+        # saved through get_state can be resumed without repeating its requests
+        progress = self._in_flight.setdefault(screen_name, {"rows": [], "max_id": None, "n_collected": 0})
+        error = None
+        try:
+            for _ in self.iter_statuses(screen_name=screen_name,
+                                        n_statuses=n_statuses,
+                                        filter_status=filter_status,
+                                        prefetch=prefetch,
+                                        progress=progress):
+                pass
+        except AccountError as e:
+            error = e
+        del self._in_flight[screen_name]
+
+        local_df = pd.DataFrame(progress["rows"], columns=self._chunk_features, dtype=object)
+        if error is not None:
+            error.statuses = local_df
+            raise error
+        return local_df
+
+    def iter_statuses(self, screen_name, n_statuses, filter_status=lambda x: True, prefetch=None, progress=None):
+
+        """
+        Lazily collect statuses from a specific account's timeline, page by page, without storing them.
+        Raw Status obj are dropped as soon as their page has been processed, so that the memory
+        used is bounded by a single timeline page whatever the number of statuses collected
+        :param screen_name: screen name or id of the account
+        :param n_statuses: number of statuses to collect for this account
+        :param filter_status: filtering function to apply to Status obj
+        :param prefetch: if True timeline pages are fetched ahead of the processing, see collect_statuses
+        :param progress: optional dict <'rows', 'max_id', 'n_collected'> updated after each page, if it already
+                         holds a partial timeline the pagination continues from where it stopped, the page hook
+                         is called once it has been updated, @see set_page_hook
+        :return: generator of pandas Series, one for each status satisfying the filtering function
+        """
 
-        # hold all account's statuses
-        all_statuses = []
+        # declarative filters are pushed down into the requests, plain functions are only applied client side
+        filter_status = as_filter(filter_status)
+        params = filter_status.request_params()
 
-        count = 200 if n_statuses > 200 else n_statuses
-        new_statuses = self.api.user_timeline(screen_name=screen_name, tweet_mode='extended', count=count)
+        max_id = params.pop("max_id", None)
+        if progress is not None and progress.get("max_id") is not None:
+            max_id = progress["max_id"]
+        n_collected = 0 if progress is None else progress.get("n_collected", 0)
 
-        # save the most recent statuses
-        all_statuses.extend(new_statuses)
+        pages = self._timeline_pages(screen_name=screen_name,
+                                     n_statuses=n_statuses,
+                                     max_id=max_id,
+                                     n_collected=n_collected,
+                                     params=params,
+                                     stop=filter_status.stop)
+        if self._prefetch if prefetch is None else prefetch:
+            pages = prefetch_iterator(pages, depth=self.PREFETCH_DEPTH)
 
         self.verboseprint("Collecting account", end='')
 
-        # save the id of the oldest status
+        for page in pages:
+            n_collected += len(page)
+            # keep all statuses that satisfy the filtering function
+            statuses = [st for st in page if filter_status(st)]
+            rows = [self._process_status(st) for st in statuses]
+            if self._drop_duplicates:
+                # the first status of each cluster is kept, even when collected again
+                kept = [row for st, row in zip(statuses, rows)
+                        if self._dedup.representative(row[self.DUPLICATE_FEATURE]) == st.id]
+                self.n_dropped += len(rows) - len(kept)
+                rows = kept
+            if progress is not None:
+                # the whole page is recorded at once, so that the progress is always consistent
+                progress.setdefault("rows", []).extend(rows)
+                progress["max_id"] = page[-1].id - 1
+                progress["n_collected"] = n_collected
+                if self._page_hook is not None:
+                    self._page_hook(screen_name)
+            for row in rows:
+                yield row
+
+        self.retry_policy.breaker.record_success(screen_name)
+        self.verboseprint("\nAccount collected : {}/{} statuses..".format(n_collected, n_statuses))
+        logging.debug("Collected {}/{} statuses..".format(n_collected, n_statuses))
+
+    def _timeline_pages(self, screen_name, n_statuses, max_id=None, n_collected=0, params=None, stop=None):
+
+        """
+        Generator fetching the timeline of an account one page after another, from the most recent status
+        :param screen_name: screen name or id of the account
+        :param n_statuses: number of statuses to collect for this account
+        :param max_id: if not None starts from this status id, going backward
+        :param n_collected: number of statuses already collected from a previous partial pagination
+        :param params: additional user_timeline parameters, for instance since_id
+        :param stop: function Status --> Bool, if True on the oldest status of a page the pagination stops
+        :return: generator of lists of tweepy Status obj
+        :raise AccountError: if the account is given up by the retry policy
+        """
+
+        params = {} if params is None else params
+        # retries spent on this account, bounded by the account budget of the retry policy
+        spent = {"retries": 0}
+
+        n_statuses = Collector.MAX_STATUSES if n_statuses > Collector.MAX_STATUSES else n_statuses
 
-        oldest = all_statuses[-1].id if len(all_statuses) > 0 else None
+        oldest = max_id
 
         # keep grabbing statuses until no statuses left to grab or the total amount of statuses to collect was reached
-        while len(new_statuses) > 0 and len(all_statuses) < n_statuses:
-            try:
-                # remaining statuses to collect
-                remaining_statuses = n_statuses - len(all_statuses)
-                count = 200 if remaining_statuses > 200 else remaining_statuses
+        while n_collected < n_statuses:
+            # remaining statuses to collect
+            remaining_statuses = n_statuses - n_collected
+            count = self.PAGE_SIZE if remaining_statuses > self.PAGE_SIZE else remaining_statuses
 
-                # collect oldest statuses wrt previous query
-                new_statuses = self.api.user_timeline(screen_name=screen_name, tweet_mode='extended', count=count, max_id=oldest)
-                all_statuses.extend(new_statuses)
+            # collect oldest statuses wrt previous query, transient errors are retried within the budgets
+            new_statuses = self.retry_policy.call(screen_name,
+                                                  lambda: self.api.user_timeline(screen_name=screen_name,
+                                                                                 tweet_mode='extended',
+                                                                                 count=count,
+                                                                                 max_id=oldest,
+                                                                                 **params),
+                                                  spent,
+                                                  timeline=True)
 
-                # update oldest status
-                oldest = all_statuses[-1].id - 1
+            if len(new_statuses) == 0:
+                return
 
-                self.verboseprint(".", end='')
-                logging.debug("Collected {}/{} statuses..".format(len(all_statuses), n_statuses))
-            except tweepy.TweepError as e:
-                logging.warning(e)
-                continue
+            n_collected += len(new_statuses)
 
-        self.verboseprint("\nAccount collected : {}/{} statuses..".format(len(all_statuses), n_statuses))
-        logging.debug("Collected {}/{} statuses..".format(len(all_statuses), n_statuses))
+            # update oldest status
+            oldest = new_statuses[-1].id - 1
 
-        all_statuses = np.array(all_statuses)
-        # keep all statuses that satisfy the filtering function
-        all_statuses = all_statuses[list(map(filter_status, all_statuses))]
+            self.verboseprint(".", end='')
+            logging.debug("Collected {}/{} statuses..".format(n_collected, n_statuses))
 
-        local_df = pd.DataFrame(columns=self._all_features)
-        for st in all_statuses:
-            raw_data = self._process_status(st)
-            local_df = local_df.append(raw_data, ignore_index=True)
+            yield new_statuses
 
-        self.update_dataset(data=local_df)
+            if stop is not None and stop(new_statuses[-1]):
+                logging.debug("No older status can satisfy the filter..")
+                return
 
-        return local_df
+    def _duplicate_cluster(self, status, feature_name):
+
+        """
+        Feature function adding a status text to the near-duplicate index
+        :param status: status obj
+        :return: near-duplicate cluster id
+        """
+
+        text = getattr(status, "full_text", None) or getattr(status, "text", "")
+        return self._dedup.add(text, key=status.id)
 
     def _process_status(self, status):
 
@@ -397,5 +927,5 @@ class StatusCollector(Collector):
         :return: pandas Series containing all the infos
         """
 
-        return pd.Series([func(status, attr_name) for attr_name, func in self._features.items()], index=self.dataset().columns)
+        return pd.Series([func(status, attr_name) for attr_name, func in self._features.items()], index=self._features_index)
 
@@ -0,0 +1,156 @@
+"""
+Connection module, it contains the classes used by the OnlineStreamer for managing its connection.
+Backoff -> exponential backoff with jitter
+ConnectionManager -> keeps a separate backoff for network errors, HTTP errors and 420 throttling,
+                     detects stalls from keep-alive gaps and tracks reconnections and downtime.
+
+Default values follow the Twitter streaming guidelines: network errors back off linearly from 250ms up to 16s,
+HTTP errors exponentially from 5s up to 320s, 420 errors exponentially from 1 minute, a stream that does not
+receive anything (keep-alive newlines included) for 90 seconds is considered stalled.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import random
+import time
+
+
+class Backoff(object):
+
+    """ Backoff delays generator, exponential (factor > 1) or linear (factor == 1), with random jitter """
+
+    def __init__(self, start, cap, factor=2.0, jitter=0.25):
+
+        """
+        Backoff constructor
+        :param start: first delay in seconds
+        :param cap: maximum delay in seconds
+        :param factor: multiplicative factor, if 1 the delay grows linearly by start
+        :param jitter: maximum fraction of the delay randomly added, so that many clients do not retry together
+        """
+
+        self.start = start
+        self.cap = cap
+        self.factor = factor
+        self.jitter = jitter
+        self._delay = start
+
+    def reset(self):
+
+        """ Restart from the first delay """
+
+        self._delay = self.start
+
+    def next_delay(self):
+
+        """
+        Returns the next delay, advancing the backoff
+        :return: seconds to wait
+        """
+
+        delay = self._delay
+        if self.factor == 1:
+            self._delay = min(self._delay + self.start, self.cap)
+        else:
+            self._delay = min(self._delay * self.factor, self.cap)
+        return delay * (1 + random.uniform(0, self.jitter))
+
+
+class ConnectionManager(object):
+
+    """ Reconnection policy and statistics of a streaming connection """
+
+    NETWORK = "network"
+    HTTP = "http"
+    THROTTLE = "throttle"
+    STALL = "stall"
+
+    def __init__(self,
+                 network_backoff=None,
+                 http_backoff=None,
+                 throttle_backoff=None,
+                 stall_timeout=90,
+                 sleep=time.sleep):
+
+        """
+        ConnectionManager constructor
+        :param network_backoff: Backoff used after network errors and stalls
+        :param http_backoff: Backoff used after HTTP errors
+        :param throttle_backoff: Backoff used after 420 errors
+        :param stall_timeout: seconds without receiving anything after which the stream is considered stalled
+        :param sleep: sleep function, seconds --> None
+        """
+
+        self.stall_timeout = stall_timeout
+        self._sleep = sleep
+        self._backoffs = {ConnectionManager.NETWORK: network_backoff or Backoff(0.25, 16, factor=1),
+                          ConnectionManager.HTTP: http_backoff or Backoff(5, 320),
+                          ConnectionManager.THROTTLE: throttle_backoff or Backoff(60, 960)}
+        self._backoffs[ConnectionManager.STALL] = self._backoffs[ConnectionManager.NETWORK]
+
+        self.reconnects = {kind: 0 for kind in self._backoffs}
+        self.downtime = 0.0
+        self.last_activity = None
+        self._disconnected_at = None
+
+    def connected(self):
+
+        """ Called when the connection is established, resets the backoffs and accounts the downtime """
+
+        now = time.time()
+        if self._disconnected_at is not None:
+            self.downtime += now - self._disconnected_at
+            self._disconnected_at = None
+        self.last_activity = now
+        for backoff in self._backoffs.values():
+            backoff.reset()
+
+    def disconnected(self):
+
+        """ Called when the connection is lost, starts accounting the downtime """
+
+        if self._disconnected_at is None:
+            self._disconnected_at = time.time()
+
+    def activity(self):
+
+        """ Called whenever something, data or keep-alive, is received """
+
+        self.last_activity = time.time()
+
+    def is_stalled(self):
+
+        """ Checks whether nothing has been received for more than stall_timeout seconds """
+
+        return self.last_activity is not None and (time.time() - self.last_activity) > self.stall_timeout
+
+    def wait(self, kind):
+
+        """
+        Wait before reconnecting, in according to the backoff of the error kind
+        :param kind: one of NETWORK, HTTP, THROTTLE, STALL
+        :return: seconds waited
+        """
+
+        self.disconnected()
+        self.reconnects[kind] += 1
+        delay = self._backoffs[kind].next_delay()
+        logging.warning("Reconnecting in {:.2f} seconds after {} error..".format(delay, kind))
+        self._sleep(delay)
+        return delay
+
+    def stats(self):
+
+        """
+        Returns the connection statistics
+        :return: dict with the reconnections by error kind, their total and the downtime in seconds
+        """
+
+        downtime = self.downtime
+        if self._disconnected_at is not None:
+            downtime += time.time() - self._disconnected_at
+        return {"reconnects": dict(self.reconnects),
+                "total_reconnects": sum(self.reconnects.values()),
+                "downtime": downtime}
@@ -0,0 +1,238 @@
+"""
+Crawler module, it contains the classes used for snowball crawling accounts starting from some seeds.
+Frontier -> bounded priority queue of the accounts discovered and not crawled yet
+SnowballCrawler -> crawls accounts through an AccountCollector, expanding each of them through the accounts
+                   it interacted with (quoted, replied, retweeted, mentioned), tracking the visited ones
+                   in a Bloom filter.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+import logging
+
+import tweepy
+
+from ptdc.graph import InteractionGraph
+from ptdc.sketch import BloomFilter, CountMinSketch
+from ptdc.support import is_valid_id, valid_ids
+
+
+class Frontier(object):
+
+    """ Bounded max-priority queue of account ids, the lowest priority entries are dropped when full """
+
+    def __init__(self, max_size=10 ** 6):
+
+        """
+        Frontier constructor
+        :param max_size: maximum number of entries kept, if None the frontier is unbounded
+        """
+
+        self.max_size = max_size
+        self._heap = []
+        self.n_dropped = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, user_id, priority, depth=0):
+
+        """
+        Add an account to the frontier, the same account can be pushed many times
+        :param user_id: account id
+        :param priority: priority of the account, higher first
+        :param depth: distance from the seeds
+        """
+
+        heapq.heappush(self._heap, (-priority, depth, user_id))
+        if self.max_size is not None and len(self._heap) > self.max_size:
+            self._shrink()
+
+    def pop(self):
+
+        """
+        Remove the highest priority account
+        :return: tuple (user_id, priority, depth)
+        """
+
+        priority, depth, user_id = heapq.heappop(self._heap)
+        return user_id, -priority, depth
+
+    def _shrink(self):
+
+        """ Keep only the best three quarters of max_size, so that shrinking is amortized over many pushes """
+
+        keep = max(1, (self.max_size * 3) // 4)
+        self.n_dropped += len(self._heap) - keep
+        # a sorted list is a valid heap
+        self._heap = heapq.nsmallest(keep, self._heap)
+        logging.debug("Frontier shrunk, {} entries dropped so far..".format(self.n_dropped))
+
+
+class SnowballCrawler(object):
+
+    """ Snowball crawler over the accounts interactions """
+
+    EXPAND_FEATURES = tuple(InteractionGraph.TIMELINE_FEATURES.keys())
+
+    def __init__(self,
+                 collector,
+                 n_statuses,
+                 priority="degree",
+                 max_depth=None,
+                 expected_accounts=10 ** 6,
+                 error_rate=0.01,
+                 max_frontier=10 ** 6,
+                 expand_features=None,
+                 filter_account=lambda x: True,
+                 filter_status=lambda x: True,
+                 verbose=True):
+
+        """
+        SnowballCrawler constructor
+        :param collector: AccountCollector used for collecting the crawled accounts,
+                          its timeline features must include the expand features
+        :param n_statuses: number of statuses to collect for each account
+        :param priority: frontier priority, one of:
+                         'degree' -> accounts discovered more times first (counted through a CountMinSketch)
+                         'followers' -> accounts discovered by accounts with more followers first
+                         'bfs' -> accounts nearer to the seeds first
+                         or a function (user_id, source_row, depth) --> float
+        :param max_depth: maximum distance from the seeds, if None don't consider
+        :param expected_accounts: expected number of visited accounts, used for sizing the visited Bloom filter
+        :param error_rate: false positive rate of the visited Bloom filter, i.e. rate of accounts wrongly skipped
+        :param max_frontier: maximum number of frontier entries, if None the frontier is unbounded
+        :param expand_features: account features holding the list of ids to expand, default EXPAND_FEATURES
+        :param filter_account: filtering function to apply to the Account obj
+        :param filter_status: filtering function to apply to the Status obj
+        :param verbose: verbosity
+        """
+
+        self.collector = collector
+        self.n_statuses = n_statuses
+        self.max_depth = max_depth
+        self.expand_features = SnowballCrawler.EXPAND_FEATURES if expand_features is None else tuple(expand_features)
+        self.filter_account = filter_account
+        self.filter_status = filter_status
+        self._verbose = verbose
+        self.verboseprint = print if self._verbose else lambda *args: None
+
+        self.visited = BloomFilter(capacity=expected_accounts, error_rate=error_rate)
+        self.frontier = Frontier(max_size=max_frontier)
+        self._seeds = []
+        self._discovered = CountMinSketch() if priority == "degree" else None
+        self._priority = self._init_priority(priority)
+
+        self.count = 0
+        self.n_failed = 0
+
+    def _init_priority(self, priority):
+
+        """
+        Returns the priority function
+        :param priority: priority name or function
+        :return: function (user_id, source_row, depth) --> float
+        """
+
+        if callable(priority):
+            return priority
+        elif priority == "degree":
+            return lambda user_id, row, depth: self._discovered.add(user_id)
+        elif priority == "followers":
+            return lambda user_id, row, depth: row.get("followers_count") or 0
+        elif priority == "bfs":
+            return lambda user_id, row, depth: -depth
+        raise ValueError("Unknown priority: {}".format(priority))
+
+    def seed(self, screen_names):
+
+        """
+        Add the seeds of the crawling, collected before any frontier account
+        :param screen_names: iterable of screen_names or ids
+        """
+
+        self._seeds.extend(screen_names)
+
+    def crawl(self, max_accounts=None):
+
+        """
+        Crawl until the frontier is empty or the maximum number of accounts is reached,
+        it can be called again for continuing the crawling
+        :param max_accounts: maximum number of accounts to collect in this call, if None don't consider
+        :return: number of accounts collected in this call
+        """
+
+        collected = 0
+        while max_accounts is None or collected < max_accounts:
+            if self._seeds:
+                user_id, depth = self._seeds.pop(0), 0
+            elif len(self.frontier) > 0:
+                user_id, _, depth = self.frontier.pop()
+                if user_id in self.visited:
+                    continue
+            else:
+                break
+
+            if self._visit(user_id, depth):
+                collected += 1
+
+        self.verboseprint("Crawled {} accounts, {} in frontier..".format(self.count, len(self.frontier)))
+        return collected
+
+    def _visit(self, user_id, depth):
+
+        """
+        Collect an account and expand it into the frontier
+        :param user_id: screen_name or id of the account
+        :param depth: distance from the seeds
+        :return: True if the account has been collected
+        """
+
+        self.visited.add(user_id)
+        try:
+            row = self.collector.collect_account(screen_name=user_id,
+                                                 n_statuses=self.n_statuses,
+                                                 filter_account=self.filter_account,
+                                                 filter_status=self.filter_status)
+        except tweepy.TweepError as e:
+            logging.warning("Account {} not crawled: {}".format(user_id, e))
+            self.n_failed += 1
+            return False
+
+        if row is None:
+            return False
+        if row.get(self.collector.ERROR_FEATURE) is not None or \
+                not (is_valid_id(row["id"]) and is_valid_id(row["screen_name"])):
+            # the account could not be (completely) collected, the row records why
+            if is_valid_id(row["id"]):
+                self.visited.add(row["id"])
+            self.n_failed += 1
+            return False
+
+        self.visited.add(row["id"])
+        self.count += 1
+
+        if self.max_depth is None or depth < self.max_depth:
+            self._expand(row, depth + 1)
+        return True
+
+    def _expand(self, row, depth):
+
+        """
+        Push into the frontier the accounts an account interacted with
+        :param row: pandas Series of the collected account
+        :param depth: distance from the seeds of the discovered accounts
+        """
+
+        discovered = set()
+        for feature in self.expand_features:
+            ids = row.get(feature)
+            if ids:
+                discovered.update(int(user_id) for user_id in valid_ids(ids))
+
+        # each account is pushed once for every account that discovered it
+        for user_id in discovered:
+            if user_id not in self.visited:
+                self.frontier.push(user_id, self._priority(user_id, row, depth), depth)
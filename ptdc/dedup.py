@@ -0,0 +1,199 @@
+"""
+Dedup module, it contains the NearDuplicateIndex class used for detecting near-duplicate statuses while collecting.
+NearDuplicateIndex -> incremental MinHash/LSH index over the status texts, each text is assigned to a cluster of
+                      near-duplicates (estimated Jaccard similarity of their shingles above a threshold) looking up
+                      only the LSH buckets of its signature, so that an insert costs the same whatever the number of
+                      texts indexed. Only the signature of the first text of each cluster is kept, so that the memory
+                      used is proportional to the unique content.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# urls, mentions and the retweet prefix change between copies of the same content
+_NOISE = re.compile(r"^rt @\w+:|https?://\S+|@\w+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text):
+
+    """
+    Normalize a status text before shingling: lowercase, without urls, mentions and retweet prefix
+    :param text: str
+    :return: str
+    """
+
+    return _SPACES.sub(" ", _NOISE.sub(" ", text.lower())).strip()
+
+
+def lsh_params(threshold, num_perm):
+
+    """
+    Returns the number of bands and of rows per band whose LSH threshold (1 / bands) ** (1 / rows) is the highest
+    one not above the similarity threshold, so that near-duplicates are rarely missed, false candidates are
+    discarded by comparing the signatures anyway
+    :param threshold: Jaccard similarity threshold
+    :param num_perm: signature length
+    :return: tuple (bands, rows)
+    """
+
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex(object):
+
+    """ Incremental MinHash/LSH near-duplicate clustering of texts """
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=5, seed=1):
+
+        """
+        NearDuplicateIndex constructor
+        :param threshold: estimated Jaccard similarity above which two texts are near-duplicates
+        :param num_perm: number of hash functions of the MinHash signatures
+        :param shingle_size: length of the character shingles
+        :param seed: seed of the hash functions, indexes must share it for their signatures to be comparable
+        """
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+        # one dict for each band, band bytes -> cluster id
+        self._buckets = [{} for _ in range(self.bands)]
+        # cluster id -> signature of its first text
+        self._signatures = []
+        # cluster id -> key of its first text
+        self._representatives = []
+        # cluster id -> number of texts added
+        self._sizes = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def n_clusters(self):
+        return len(self._signatures)
+
+    @property
+    def n_duplicates(self):
+        return self.count - self.n_clusters
+
+    def signature(self, text):
+
+        """
+        Compute the MinHash signature of a text
+        :param text: str
+        :return: numpy array of num_perm uint64
+        """
+
+        text = normalize_text(text or "")
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # universal hashing of every shingle with every function, then the minimum of each function
+        permuted = np.bitwise_and((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _similarity(self, signature, cluster_id):
+        return float(np.mean(self._signatures[cluster_id] == signature))
+
+    def _find(self, signature, band_keys):
+
+        """
+        Returns the most similar cluster among the ones sharing a bucket with the signature
+        :return: cluster id, None if no cluster is similar enough
+        """
+
+        best, best_similarity = None, self.threshold
+        for bucket, key in zip(self._buckets, band_keys):
+            cluster_id = bucket.get(key)
+            if cluster_id is not None and cluster_id != best:
+                similarity = self._similarity(signature, cluster_id)
+                if similarity >= best_similarity:
+                    best, best_similarity = cluster_id, similarity
+        return best
+
+    def query(self, text):
+
+        """
+        Returns the cluster of a text, without adding it
+        :param text: str
+        :return: cluster id, None if the text is not a near-duplicate of any indexed one
+        """
+
+        signature = self.signature(text)
+        return self._find(signature, self._band_keys(signature))
+
+    def add(self, text, key=None):
+
+        """
+        Add a text, assigning it to the cluster of its near-duplicates or to a new one
+        :param text: str
+        :param key: optional key of the text, for instance the status id, recorded for the first text of a cluster
+        :return: cluster id
+        """
+
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        cluster_id = self._find(signature, band_keys)
+        if cluster_id is None:
+            cluster_id = len(self._signatures)
+            self._signatures.append(signature)
+            self._representatives.append(key)
+            self._sizes.append(0)
+            # only the first text of a cluster is bucketed, duplicates are compared against it,
+            # buckets already taken keep pointing to their first cluster
+            for bucket, band_key in zip(self._buckets, band_keys):
+                bucket.setdefault(band_key, cluster_id)
+        self._sizes[cluster_id] += 1
+        self.count += 1
+        return cluster_id
+
+    def representative(self, cluster_id):
+
+        """
+        Returns the key of the first text of a cluster
+        :param cluster_id: cluster id
+        """
+
+        return self._representatives[cluster_id]
+
+    def cluster_size(self, cluster_id):
+
+        """
+        Returns the number of texts added to a cluster
+        :param cluster_id: cluster id
+        """
+
+        return self._sizes[cluster_id]
+
+    def cluster_sizes(self):
+
+        """
+        Returns the number of texts added to each cluster
+        :return: numpy array indexed by cluster id
+        """
+
+        return np.array(self._sizes, dtype=np.int64)
@@ -0,0 +1,216 @@
+"""
+Entities module, it contains the classes used for storing the list-valued status entities in normalized form.
+EntityDictionary -> shared string dictionary, each distinct entity (hashtag, mention, symbol, media url)
+                    is stored once and referred to by an integer id
+EntityTables -> side tables (status_id, entity_id), one for each entity field, stored in compact integer arrays,
+                so that joins and aggregates over the entities are vectorized
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def entity_key(value):
+
+    """
+    Returns the string stored for an entity value, symbols are dicts holding their text
+    :param value: str or dict entity
+    """
+
+    if isinstance(value, dict):
+        return str(value.get("text", value))
+    return str(value)
+
+
+class EntityDictionary(object):
+
+    """ Dictionary encoding strings into dense integer ids """
+
+    def __init__(self):
+        self._ids = {}
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def encode(self, value):
+
+        """
+        Returns the id of a string, adding it if new
+        :param value: str
+        :return: int
+        """
+
+        entity_id = self._ids.get(value)
+        if entity_id is None:
+            entity_id = self._ids[value] = len(self._values)
+            self._values.append(value)
+        return entity_id
+
+    def decode(self, ids):
+
+        """
+        Returns the strings of some ids
+        :param ids: array-like of ints
+        :return: numpy array of str
+        """
+
+        return np.array(self._values, dtype=object)[np.asarray(ids, dtype=np.int64)]
+
+    def frame(self):
+
+        """
+        Returns the dictionary as a DataFrame (entity_id, value)
+        :return: pandas DataFrame
+        """
+
+        return pd.DataFrame({"entity_id": np.arange(len(self._values), dtype=np.int64),
+                             "value": np.array(self._values, dtype=object)})
+
+
+class EntityTables(object):
+
+    """ Normalized (status_id, entity_id) tables of the list-valued status entities """
+
+    DEFAULT_FIELDS = ("hashtags", "user_mentions", "symbols", "media_urls")
+
+    def __init__(self, fields=DEFAULT_FIELDS, dictionary=None, capacity=1024):
+
+        """
+        EntityTables constructor
+        :param fields: list-valued status features stored as side tables
+        :param dictionary: EntityDictionary shared by all the fields, if None a new one
+        :param capacity: initial number of pairs allocated for each field, arrays grow geometrically when full
+        """
+
+        self.fields = tuple(fields)
+        self.dictionary = EntityDictionary() if dictionary is None else dictionary
+        # field -> [status ids, entity ids, number of pairs]
+        self._tables = {field: [np.empty(capacity, dtype=np.int64), np.empty(capacity, dtype=np.int64), 0]
+                        for field in self.fields}
+
+    def __len__(self):
+        return sum(table[2] for table in self._tables.values())
+
+    def _reserve(self, table, n):
+
+        """
+        Make room for n more pairs in a table
+        :param table: [status ids, entity ids, number of pairs]
+        :param n: number of pairs to add
+        """
+
+        needed = table[2] + n
+        if needed <= table[0].shape[0]:
+            return
+        capacity = max(needed, 2 * table[0].shape[0])
+        for i in (0, 1):
+            new = np.empty(capacity, dtype=np.int64)
+            new[:table[2]] = table[i][:table[2]]
+            table[i] = new
+
+    def add(self, status_id, field, values):
+
+        """
+        Add the entities of a status
+        :param status_id: id of the status
+        :param field: entity field, for instance 'hashtags'
+        :param values: list of entities, None is ignored
+        """
+
+        if not values:
+            return
+        table = self._tables[field]
+        entity_ids = [self.dictionary.encode(entity_key(value)) for value in values]
+        self._reserve(table, len(entity_ids))
+        end = table[2] + len(entity_ids)
+        table[0][table[2]:end] = status_id
+        table[1][table[2]:end] = entity_ids
+        table[2] = end
+
+    def add_frame(self, df, id_feature="id"):
+
+        """
+        Add the entities of a statuses DataFrame, the fields missing from it are ignored
+        :param df: pandas DataFrame of statuses, holding the fields as list cells
+        :param id_feature: name of the column holding the status id
+        """
+
+        if df.shape[0] == 0:
+            return
+        status_ids = df[id_feature].to_numpy()
+        for field in self.fields:
+            if field not in df.columns:
+                continue
+            for status_id, values in zip(status_ids, df[field].to_numpy()):
+                if isinstance(values, (list, tuple)):
+                    self.add(status_id, field, values)
+
+    def table(self, field):
+
+        """
+        Returns the side table of a field
+        :param field: entity field
+        :return: pandas DataFrame (status_id, entity_id)
+        """
+
+        status_ids, entity_ids, n = self._tables[field]
+        return pd.DataFrame({"status_id": status_ids[:n].copy(), "entity_id": entity_ids[:n].copy()})
+
+    def values(self, field):
+
+        """
+        Returns the side table of a field joined with the dictionary
+        :param field: entity field
+        :return: pandas DataFrame (status_id, value)
+        """
+
+        status_ids, entity_ids, n = self._tables[field]
+        return pd.DataFrame({"status_id": status_ids[:n].copy(), "value": self.dictionary.decode(entity_ids[:n])})
+
+    def counts(self, field):
+
+        """
+        Returns how many times each entity of a field occurs
+        :param field: entity field
+        :return: pandas Series <value, count>, sorted by decreasing count
+        """
+
+        entity_ids = self._tables[field][1][:self._tables[field][2]]
+        counts = np.bincount(entity_ids, minlength=len(self.dictionary))
+        present = np.flatnonzero(counts)
+        return pd.Series(counts[present], index=self.dictionary.decode(present)).sort_values(ascending=False)
+
+    def nbytes(self):
+
+        """ Returns the memory used by the side tables, dictionary excluded """
+
+        return sum(table[0][:table[2]].nbytes + table[1][:table[2]].nbytes for table in self._tables.values())
+
+    def clear(self):
+
+        """ Remove all the pairs, the dictionary is kept """
+
+        for table in self._tables.values():
+            table[2] = 0
+
+    def save(self, path, sep='\t'):
+
+        """
+        Save the side tables at <path without extension>_<field>.csv and the dictionary at
+        <path without extension>_entities.csv
+        :param path: statuses file's path
+        :param sep: separator of csv
+        """
+
+        base = os.path.splitext(path)[0]
+        for field in self.fields:
+            self.table(field).to_csv(path_or_buf="{}_{}.csv".format(base, field), sep=sep, index=False)
+        self.dictionary.frame().to_csv(path_or_buf="{}_entities.csv".format(base), sep=sep, index=False)
+        logging.debug("Entity tables saved at {}_*.csv..".format(base))
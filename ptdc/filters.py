@@ -0,0 +1,208 @@
+"""
+Filters module, it contains declarative status filters.
+Differently from an opaque filtering function, a StatusFilter can tell the collector which request parameters
+implement it on the server side and when the timeline pagination can stop, so that the filtered out statuses
+do not cost requests. The client side check is always applied too, so any filter can be used as a plain
+filtering function: Status --> Bool.
+
+ExcludeReplies -> client side only, see its doc
+ExcludeRetweets -> client side only, see its doc
+DateRange -> since_id/max_id request parameters, computed from the dates, and early stopping
+Language -> client side only
+CallableFilter -> wraps any filtering function
+Filters are combined through &, for instance ExcludeReplies() & Language('en')
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+from datetime import datetime, timezone
+
+# milliseconds epoch of the snowflake ids of Twitter
+TWITTER_EPOCH = 1288834974657
+
+
+def datetime_to_id(date):
+
+    """
+    Returns the lowest status id that can be created at a given date, through the snowflake id layout
+    :param date: datetime obj, naive dates are considered UTC
+    :return: status id
+    """
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0, (int(date.timestamp() * 1000) - TWITTER_EPOCH) << 22)
+
+
+def _to_utc(date):
+
+    """
+    Convert a datetime obj or a timestamp in seconds into a naive UTC datetime, as tweepy created_at
+    :param date: datetime obj or seconds, None is returned unchanged
+    """
+
+    if date is None:
+        return None
+    if not isinstance(date, datetime):
+        date = datetime.fromtimestamp(date, tz=timezone.utc)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+class StatusFilter(object):
+
+    """ Declarative status filter, by default it admits every status """
+
+    def __call__(self, status):
+        return True
+
+    def __and__(self, other):
+        return AllOf([self, as_filter(other)])
+
+    def request_params(self):
+
+        """
+        Returns the user_timeline parameters implementing the filter on the server side
+        :return: dict
+        """
+
+        return {}
+
+    def stop(self, status):
+
+        """
+        Checks whether the pagination can stop at this status, since no older status can satisfy the filter
+        :param status: tweepy Status obj
+        """
+
+        return False
+
+
+class CallableFilter(StatusFilter):
+
+    """ Client side filter wrapping a filtering function """
+
+    def __init__(self, func):
+
+        """
+        CallableFilter constructor
+        :param func: filtering function, Status --> Bool
+        """
+
+        self.func = func
+
+    def __call__(self, status):
+        return self.func(status)
+
+
+class ExcludeReplies(StatusFilter):
+
+    """
+    Excludes the replies, client side only: the server would apply the page size before removing them,
+    so that a page made only of replies would come back empty, as if the timeline was over
+    """
+
+    def __call__(self, status):
+        return status.in_reply_to_status_id is None
+
+
+class ExcludeRetweets(StatusFilter):
+
+    """ Excludes the retweets, client side only for the same reason of ExcludeReplies """
+
+    def __call__(self, status):
+        return not hasattr(status, "retweeted_status")
+
+
+class Language(StatusFilter):
+
+    """ Keeps the statuses in the given languages, client side only """
+
+    def __init__(self, *languages):
+
+        """
+        Language constructor
+        :param languages: language codes, for instance 'en', 'it'
+        """
+
+        self.languages = set(languages)
+
+    def __call__(self, status):
+        return getattr(status, "lang", None) in self.languages
+
+
+class DateRange(StatusFilter):
+
+    """ Keeps the statuses created within [since, until) """
+
+    def __init__(self, since=None, until=None):
+
+        """
+        DateRange constructor
+        :param since: datetime obj or timestamp in seconds, if None don't consider
+        :param until: datetime obj or timestamp in seconds, excluded, if None don't consider
+        """
+
+        self.since = _to_utc(since)
+        self.until = _to_utc(until)
+
+    def __call__(self, status):
+        return (self.since is None or status.created_at >= self.since) and \
+               (self.until is None or status.created_at < self.until)
+
+    def request_params(self):
+        params = {}
+        if self.since is not None:
+            params["since_id"] = max(0, datetime_to_id(self.since) - 1)
+        if self.until is not None:
+            params["max_id"] = max(0, datetime_to_id(self.until) - 1)
+        return params
+
+    def stop(self, status):
+        # timelines go backward in time
+        return self.since is not None and status.created_at < self.since
+
+
+class AllOf(StatusFilter):
+
+    """ Conjunction of filters """
+
+    def __init__(self, filters):
+
+        """
+        AllOf constructor
+        :param filters: list of StatusFilter obj
+        """
+
+        self.filters = []
+        for f in filters:
+            self.filters.extend(f.filters if isinstance(f, AllOf) else [f])
+
+    def __call__(self, status):
+        return all(f(status) for f in self.filters)
+
+    def request_params(self):
+        params = {}
+        for f in self.filters:
+            for name, value in f.request_params().items():
+                if name == "since_id" and name in params:
+                    value = max(value, params[name])
+                elif name == "max_id" and name in params:
+                    value = min(value, params[name])
+                params[name] = value
+        return params
+
+    def stop(self, status):
+        return any(f.stop(status) for f in self.filters)
+
+
+def as_filter(filter_status):
+
+    """
+    Returns a StatusFilter from a StatusFilter or a filtering function
+    :param filter_status: StatusFilter obj or function Status --> Bool
+    """
+
+    return filter_status if isinstance(filter_status, StatusFilter) else CallableFilter(filter_status)
@@ -0,0 +1,280 @@
+"""
+Graph module, it contains the InteractionGraph class used for storing interactions between accounts.
+InteractionGraph -> incrementally built directed multigraph, with typed edges (retweet, quote, reply, mention),
+                    stored in compact integer arrays and exportable in CSR format.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import logging
+
+import numpy as np
+
+from ptdc.support import is_valid_id, valid_ids
+
+
+class InteractionGraph(object):
+
+    """ Compact interaction graph between accounts, edges go from the acting account to the target one """
+
+    RETWEET = 0
+    QUOTE = 1
+    REPLY = 2
+    MENTION = 3
+
+    EDGE_TYPES = {"retweet": RETWEET, "quote": QUOTE, "reply": REPLY, "mention": MENTION}
+
+    # account timeline features -> edge type
+    TIMELINE_FEATURES = {"retweeted_user_ids": RETWEET,
+                         "quoted_user_ids": QUOTE,
+                         "replied_user_ids": REPLY,
+                         "mentioned_user_ids": MENTION}
+
+    # status features -> edge type
+    STATUS_FEATURES = {"retweeted_user_id": RETWEET,
+                       "quoted_user_id": QUOTE,
+                       "in_reply_to_user_id": REPLY}
+
+    def __init__(self, capacity=1024):
+
+        """
+        InteractionGraph constructor
+        :param capacity: initial number of edges allocated, arrays grow geometrically when full
+        """
+
+        self._src = np.empty(capacity, dtype=np.int64)
+        self._dst = np.empty(capacity, dtype=np.int64)
+        self._type = np.empty(capacity, dtype=np.int8)
+        self._n_edges = 0
+        self._csr = {}
+
+    def __len__(self):
+        return self._n_edges
+
+    def _reserve(self, n):
+
+        """
+        Make room for n more edges
+        :param n: number of edges to add
+        """
+
+        needed = self._n_edges + n
+        if needed <= self._src.shape[0]:
+            return
+        capacity = max(needed, 2 * self._src.shape[0])
+        for name in ("_src", "_dst", "_type"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._n_edges] = old[:self._n_edges]
+            setattr(self, name, new)
+
+    def add_edges(self, src, dst, edge_type):
+
+        """
+        Add many edges of the same type
+        :param src: source account id, or array-like of ids of the same length of dst
+        :param dst: array-like of target account ids
+        :param edge_type: edge type, one of the class constants or of the EDGE_TYPES names
+        """
+
+        edge_type = InteractionGraph.EDGE_TYPES.get(edge_type, edge_type)
+        dst = np.asarray(dst, dtype=np.int64).ravel()
+        n = dst.shape[0]
+        if n == 0:
+            return
+        self._reserve(n)
+        end = self._n_edges + n
+        self._src[self._n_edges:end] = np.asarray(src, dtype=np.int64)
+        self._dst[self._n_edges:end] = dst
+        self._type[self._n_edges:end] = edge_type
+        self._n_edges = end
+        self._csr.clear()
+
+    def add_edge(self, src, dst, edge_type):
+
+        """
+        Add a single edge
+        :param src: source account id
+        :param dst: target account id
+        :param edge_type: edge type, one of the class constants or of the EDGE_TYPES names
+        """
+
+        self.add_edges(src, [dst], edge_type)
+
+    def add_account(self, row, id_feature="id"):
+
+        """
+        Add the interactions of an account, read from its timeline features
+        (see default_account_timeline_features)
+        :param row: pandas Series or dict containing the account features
+        :param id_feature: name of the feature holding the account id
+        """
+
+        src = row[id_feature]
+        for feature, edge_type in InteractionGraph.TIMELINE_FEATURES.items():
+            ids = row.get(feature)
+            if ids:
+                self.add_edges(src, valid_ids(ids), edge_type)
+
+    def add_status(self, status):
+
+        """
+        Add the interactions of a single tweepy Status obj, mentions included
+        :param status: tweepy Status obj
+        """
+
+        src = status.user.id
+        retweeted = getattr(status, "retweeted_status", None)
+        if retweeted is not None:
+            self.add_edge(src, retweeted.user.id, InteractionGraph.RETWEET)
+        quoted = getattr(status, "quoted_status", None)
+        if quoted is not None and getattr(status, "is_quote_status", False):
+            self.add_edge(src, quoted.user.id, InteractionGraph.QUOTE)
+        if getattr(status, "in_reply_to_user_id", None) is not None:
+            self.add_edge(src, status.in_reply_to_user_id, InteractionGraph.REPLY)
+        mentions = getattr(status, "entities", {}).get("user_mentions", [])
+        self.add_edges(src, [m["id"] for m in mentions if "id" in m], InteractionGraph.MENTION)
+
+    def add_statuses(self, dataset, user_feature="user_id"):
+
+        """
+        Add the interactions of a whole statuses dataset (see default_statuses_features), vectorized per edge type,
+        mentions are read from the mentioned_user_ids lists, if the dataset holds them
+        :param dataset: pandas DataFrame, for instance StatusCollector.dataset()
+        :param user_feature: name of the feature holding the author id
+        """
+
+        src = dataset[user_feature].to_numpy()
+        for feature, edge_type in InteractionGraph.STATUS_FEATURES.items():
+            if feature not in dataset.columns:
+                continue
+            dst = dataset[feature].to_numpy()
+            mask = np.array([is_valid_id(x) for x in dst], dtype=bool)
+            if mask.any():
+                self.add_edges(src[mask].astype(np.int64), dst[mask].astype(np.int64), edge_type)
+        if "mentioned_user_ids" in dataset.columns:
+            for user_id, ids in zip(src, dataset["mentioned_user_ids"].to_numpy()):
+                if isinstance(ids, list) and ids:
+                    self.add_edges(user_id, valid_ids(ids), InteractionGraph.MENTION)
+
+    def edges(self, edge_type=None):
+
+        """
+        Returns the edges added so far
+        :param edge_type: if not None returns only the edges of this type
+        :return: tuple of numpy arrays (src, dst, type), views on the internal storage
+        """
+
+        src, dst, types = self._src[:self._n_edges], self._dst[:self._n_edges], self._type[:self._n_edges]
+        if edge_type is not None:
+            mask = types == InteractionGraph.EDGE_TYPES.get(edge_type, edge_type)
+            return src[mask], dst[mask], types[mask]
+        return src, dst, types
+
+    def to_csr(self, edge_type=None, reverse=False):
+
+        """
+        Export the graph in CSR format, account ids are mapped onto compact node indices
+        :param edge_type: if not None exports only the edges of this type
+        :param reverse: if True exports the transposed graph (incoming edges)
+        :return: tuple of numpy arrays (nodes, indptr, indices, types), where nodes holds the sorted account ids,
+                 and the neighbors of nodes[i] are nodes[indices[indptr[i]:indptr[i + 1]]]
+        """
+
+        key = (edge_type, reverse)
+        if key in self._csr:
+            return self._csr[key]
+
+        src, dst, types = self.edges(edge_type=edge_type)
+        if reverse:
+            src, dst = dst, src
+        nodes, inverse = np.unique(np.concatenate((src, dst)), return_inverse=True)
+        rows, cols = inverse[:src.shape[0]], inverse[src.shape[0]:]
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(nodes.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=nodes.shape[0]), out=indptr[1:])
+
+        self._csr[key] = (nodes, indptr, cols[order], types[order])
+        logging.debug("CSR built: {} nodes, {} edges..".format(nodes.shape[0], src.shape[0]))
+        return self._csr[key]
+
+    def neighbors(self, user_id, edge_type=None, reverse=False):
+
+        """
+        Returns the accounts the given one interacted with
+        :param user_id: account id
+        :param edge_type: if not None considers only the edges of this type
+        :param reverse: if True returns the accounts that interacted with the given one
+        :return: numpy array of account ids, with repetitions (one for each interaction)
+        """
+
+        nodes, indptr, indices, _ = self.to_csr(edge_type=edge_type, reverse=reverse)
+        i = np.searchsorted(nodes, user_id)
+        if i == nodes.shape[0] or nodes[i] != user_id:
+            return np.empty(0, dtype=np.int64)
+        return nodes[indices[indptr[i]:indptr[i + 1]]]
+
+    def out_degree(self, user_id, edge_type=None):
+
+        """
+        Returns the number of interactions made by the given account
+        :param user_id: account id
+        :param edge_type: if not None considers only the edges of this type
+        """
+
+        return self.neighbors(user_id, edge_type=edge_type).shape[0]
+
+    def in_degree(self, user_id, edge_type=None):
+
+        """
+        Returns the number of interactions received by the given account
+        :param user_id: account id
+        :param edge_type: if not None considers only the edges of this type
+        """
+
+        return self.neighbors(user_id, edge_type=edge_type, reverse=True).shape[0]
+
+    def degrees(self, edge_type=None, reverse=False):
+
+        """
+        Returns the degree of all the accounts
+        :param edge_type: if not None considers only the edges of this type
+        :param reverse: if True returns the in-degrees, otherwise the out-degrees
+        :return: tuple of numpy arrays (nodes, degrees)
+        """
+
+        nodes, indptr, _, _ = self.to_csr(edge_type=edge_type, reverse=reverse)
+        return nodes, np.diff(indptr)
+
+    def save(self, path):
+
+        """
+        Save the graph in numpy binary format
+        :param path: file's path
+        """
+
+        src, dst, types = self.edges()
+        np.savez_compressed(path, src=src, dst=dst, type=types)
+        logging.debug("Graph saved at {}..".format(path))
+
+    @classmethod
+    def load(cls, path):
+
+        """
+        Load a graph previously saved
+        :param path: file's path
+        :return: InteractionGraph obj
+        """
+
+        with np.load(path) as data:
+            graph = cls(capacity=max(1, data["src"].shape[0]))
+            graph._reserve(data["src"].shape[0])
+            n = data["src"].shape[0]
+            graph._src[:n] = data["src"]
+            graph._dst[:n] = data["dst"]
+            graph._type[:n] = data["type"]
+            graph._n_edges = n
+        logging.debug("Graph loaded from {}..".format(path))
+        return graph
+
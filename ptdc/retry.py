@@ -0,0 +1,248 @@
+"""
+Retry module, it contains the classes used by the collectors for bounding the requests spent on failing accounts.
+RetryPolicy -> retries the transient errors of a request with exponential backoff, within a per request
+               and a per account budget, and gives up at once on the permanent ones (suspended, protected..)
+CircuitBreaker -> remembers the accounts that keep failing, so that they are skipped without any request
+                  until a cooldown is elapsed
+AccountError -> TweepError raised when an account is given up, its reason is recorded in the account row
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import time
+
+import tweepy
+
+from ptdc.connection import Backoff
+
+# reasons why an account is given up
+SUSPENDED = "suspended"
+PROTECTED = "protected"
+NOT_FOUND = "not_found"
+RETRIES_EXHAUSTED = "retries_exhausted"
+CIRCUIT_OPEN = "circuit_open"
+
+# Twitter error codes of the permanent errors
+_API_CODES = {63: SUSPENDED, 50: NOT_FOUND, 34: NOT_FOUND, 179: PROTECTED}
+_STATUS_CODES = {404: NOT_FOUND}
+_RATE_LIMIT_CODES = {88}
+# Twitter error codes of the authentication failures, that do not depend on the account
+_AUTH_CODES = {32, 89, 215}
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def error_reason(error, timeline=False):
+
+    """
+    Returns why a request failed permanently because of the account
+    :param error: TweepError obj
+    :param timeline: True if the error comes from a user_timeline request, where a 401 without error code
+                     means that the account is protected
+    :return: SUSPENDED, PROTECTED or NOT_FOUND, None if the error is transient and the request can be retried
+    """
+
+    if error.api_code in _API_CODES:
+        return _API_CODES[error.api_code]
+    if timeline and error.api_code is None and _status_code(error) == 401:
+        return PROTECTED
+    return _STATUS_CODES.get(_status_code(error))
+
+
+def is_auth_error(error, timeline=False):
+
+    """
+    Checks whether an error is an authentication failure, for instance revoked or expired credentials,
+    that does not depend on the account and would fail every request
+    :param error: TweepError obj
+    :param timeline: True if the error comes from a user_timeline request, @see error_reason
+    """
+
+    if error.api_code in _AUTH_CODES:
+        return True
+    return _status_code(error) == 401 and error_reason(error, timeline) is None
+
+
+def is_rate_limit(error):
+
+    """
+    Checks whether an error is a rate limit one, that does not depend on the account
+    :param error: TweepError obj
+    """
+
+    return error.api_code in _RATE_LIMIT_CODES or _status_code(error) == 429
+
+
+class AccountError(tweepy.TweepError):
+
+    """ An account given up by the collection """
+
+    PERMANENT = (SUSPENDED, PROTECTED, NOT_FOUND)
+
+    def __init__(self, account, reason, error=None):
+
+        """
+        AccountError constructor
+        :param account: screen_name or id of the account
+        :param reason: why the account has been given up, for instance SUSPENDED
+        :param error: last TweepError obj received, if any
+        """
+
+        super(AccountError, self).__init__(reason="Account {} skipped: {}".format(account, reason),
+                                           response=getattr(error, "response", None),
+                                           api_code=getattr(error, "api_code", None))
+        self.account = account
+        self.reason = reason
+        self.error = error
+        # statuses collected before the error, set by the statuses collector
+        self.statuses = None
+
+
+class CircuitBreaker(object):
+
+    """ Per account circuit breaker, open after threshold consecutive failures, half open after cooldown """
+
+    def __init__(self, threshold=3, cooldown=3600, clock=time.time):
+
+        """
+        CircuitBreaker constructor
+        :param threshold: consecutive failed collections opening the circuit of an account
+        :param cooldown: seconds after which an open account is tried again, once
+        :param clock: time function, returning seconds
+        """
+
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        # account -> [consecutive failures, time of the last failure]
+        self._failures = {}
+
+    @staticmethod
+    def _key(account):
+        return str(account).lower()
+
+    def allow(self, account):
+
+        """
+        Checks whether an account can be requested
+        :param account: screen_name or id
+        """
+
+        failures = self._failures.get(self._key(account))
+        if failures is None or failures[0] < self.threshold:
+            return True
+        return self._clock() - failures[1] >= self.cooldown
+
+    def record_success(self, account):
+
+        """
+        Record a completed collection, closing the circuit of the account
+        :param account: screen_name or id
+        """
+
+        self._failures.pop(self._key(account), None)
+
+    def record_failure(self, account, permanent=False):
+
+        """
+        Record a failed collection
+        :param account: screen_name or id
+        :param permanent: if True the circuit is opened at once
+        """
+
+        failures = self._failures.setdefault(self._key(account), [0, 0])
+        failures[0] = max(failures[0] + 1, self.threshold if permanent else 0)
+        failures[1] = self._clock()
+
+    def open_accounts(self):
+
+        """ Returns the accounts currently skipped """
+
+        now = self._clock()
+        return [account for account, (count, last) in self._failures.items()
+                if count >= self.threshold and now - last < self.cooldown]
+
+
+class RetryPolicy(object):
+
+    """ Bounded retries with backoff of the requests made for an account """
+
+    def __init__(self,
+                 max_retries=3,
+                 account_budget=10,
+                 backoff_start=1,
+                 backoff_cap=60,
+                 breaker=None,
+                 sleep=time.sleep):
+
+        """
+        RetryPolicy constructor
+        :param max_retries: retries of a single request
+        :param account_budget: retries of all the requests made during the collection of an account
+        :param backoff_start: first delay in seconds
+        :param backoff_cap: maximum delay in seconds
+        :param breaker: CircuitBreaker obj, if None a default one
+        :param sleep: sleep function, taking seconds
+        """
+
+        self.max_retries = max_retries
+        self.account_budget = account_budget
+        self.backoff_start = backoff_start
+        self.backoff_cap = backoff_cap
+        self.breaker = CircuitBreaker() if breaker is None else breaker
+        self._sleep = sleep
+        self.n_retries = 0
+        self.n_given_up = 0
+
+    def call(self, account, request, spent=None, timeline=False):
+
+        """
+        Make a request for an account, retrying its transient errors
+        :param account: screen_name or id of the account
+        :param request: function making the request
+        :param spent: dict <'retries'> shared by the requests of the same account collection, if None a new one
+        :param timeline: True if request is a user_timeline one, @see error_reason
+        :return: the request result
+        :raise AccountError: if the account is skipped by the circuit breaker, if the error is permanent
+                             or if a retry budget is exhausted
+        :raise TweepError: if the authentication failed, the account is not blamed for it
+        """
+
+        if not self.breaker.allow(account):
+            raise AccountError(account, CIRCUIT_OPEN)
+
+        spent = {"retries": 0} if spent is None else spent
+        backoff = Backoff(self.backoff_start, self.backoff_cap)
+        retries = 0
+        while True:
+            try:
+                result = request()
+            except tweepy.TweepError as e:
+                if is_auth_error(e, timeline):
+                    raise
+                reason = error_reason(e, timeline)
+                if reason is not None:
+                    self.breaker.record_failure(account, permanent=True)
+                    self.n_given_up += 1
+                    raise AccountError(account, reason, e)
+
+                retries += 1
+                spent["retries"] = spent.get("retries", 0) + 1
+                if retries > self.max_retries or spent["retries"] > self.account_budget:
+                    # rate limits do not depend on the account
+                    if not is_rate_limit(e):
+                        self.breaker.record_failure(account)
+                    self.n_given_up += 1
+                    raise AccountError(account, RETRIES_EXHAUSTED, e)
+
+                delay = backoff.next_delay()
+                self.n_retries += 1
+                logging.warning("{}, retrying account {} in {:.1f}s..".format(e, account, delay))
+                self._sleep(delay)
+            else:
+                return result
@@ -0,0 +1,466 @@
+"""
+Sharding module, it contains the classes used for running the collection on several processes.
+ShardedCollector -> coordinator of a pool of worker processes, each one owning its own credentials, api and
+                    AccountCollector, the accounts are assigned to the workers by hashing their id, so that the
+                    featurization is not bound by a single interpreter and the requests by a single rate limit.
+                    The datasets of the workers are merged into the layout produced by AccountCollector.save_dataset
+WorkerError -> raised by the coordinator when a worker process died or did not reply in time
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import tempfile
+import time
+
+import pandas as pd
+
+from ptdc.support import authenticate
+
+# seconds between two checks of the queues, by the workers, and of the workers liveness, by the coordinator
+_POLL_INTERVAL = 0.5
+
+
+class WorkerError(RuntimeError):
+
+    """ A worker process died or did not reply in time """
+
+    pass
+
+
+def shard_of(key, n_shards):
+
+    """
+    Returns the shard of an account, stable across processes and runs
+    :param key: user id, or screen_name (case insensitive) when the id is not known
+    :param n_shards: number of shards
+    :return: int in [0, n_shards)
+    """
+
+    key = str(key).lower()
+    digest = hashlib.blake2b(key.encode("utf8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n_shards
+
+
+def default_collector_factory(api, statuses=False):
+
+    """
+    Build the collector of a worker
+    :param api: Tweepy API obj of the worker
+    :param statuses: if True the statuses are collected too
+    :return: AccountCollector obj
+    """
+
+    from ptdc.collector import AccountCollector, StatusCollector
+
+    statuses_collector = StatusCollector(api=api, verbose=False) if statuses else None
+    return AccountCollector(api=api, statuses_collector=statuses_collector, verbose=False)
+
+
+def _shard_path(work_dir, index):
+    return os.path.join(work_dir, "shard_{}.pkl".format(index))
+
+
+def _save_shard(collector, path):
+
+    """
+    Save the datasets of a worker collector, atomically
+    :param collector: AccountCollector obj
+    :param path: shard file's path
+    """
+
+    statuses_collector = collector._statuses_collector
+    shard = {"accounts": collector.dataset(),
+             "statuses": statuses_collector.dataset() if statuses_collector is not None else None}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(shard, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _load_shard(collector, path):
+
+    """
+    Load into a worker collector the datasets saved by a previous run, if any
+    :param collector: AccountCollector obj
+    :param path: shard file's path
+    """
+
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as file:
+        shard = pickle.load(file)
+    collector.update_dataset(shard["accounts"])
+    if shard["statuses"] is not None and collector._statuses_collector is not None:
+        collector._statuses_collector.update_dataset(shard["statuses"])
+
+
+def _worker(index, credentials, api_factory, collector_factory, filter_account, filter_status, tasks, controls,
+            results, path):
+
+    """
+    Worker process loop, it collects the accounts of its shard until the stop task is received
+    :param index: shard index
+    :param credentials: credentials dict of the worker, passed to api_factory
+    :param api_factory: function building the Tweepy API obj from the credentials
+    :param collector_factory: function building the AccountCollector from the API obj
+    :param filter_account: filtering function for users
+    :param filter_status: filtering function for statuses
+    :param tasks: queue of tasks, tuples (command, account or sequence number, n_statuses), served in order,
+                  commands are 'collect', 'save' and 'stop'
+    :param controls: queue of the 'save' commands served between two accounts, ahead of the queued tasks,
+                     tuples (command, sequence number)
+    :param results: queue where the worker replies to the 'save' and 'stop' commands,
+                    tuples (index, sequence number, n_collected, n_errors)
+    :param path: shard file's path
+    """
+
+    collector = collector_factory(api_factory(**credentials))
+    _load_shard(collector, path)
+    counts = {"collected": 0, "errors": 0}
+
+    def reply(sequence):
+        _save_shard(collector, path)
+        results.put((index, sequence, counts["collected"], counts["errors"]))
+
+    while True:
+        try:
+            while True:
+                _, sequence = controls.get_nowait()
+                reply(sequence)
+        except queue.Empty:
+            pass
+        try:
+            command, arg, n_statuses = tasks.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if command == "collect":
+            try:
+                if collector.collect_account(screen_name=arg,
+                                             n_statuses=n_statuses,
+                                             filter_account=filter_account,
+                                             filter_status=filter_status) is not None:
+                    counts["collected"] += 1
+            except Exception as e:
+                # a single account never stops the worker
+                counts["errors"] += 1
+                logging.warning("Worker {}: skipping account {}: {}".format(index, arg, e))
+        elif command == "save":
+            reply(arg)
+        elif command == "stop":
+            reply(arg)
+            break
+
+
+class ShardedCollector(object):
+
+    """ Multi-process collection coordinator, accounts sharded by id hash across workers """
+
+    def __init__(self,
+                 credentials,
+                 statuses=False,
+                 collector_factory=None,
+                 api_factory=authenticate,
+                 filter_account=None,
+                 filter_status=None,
+                 queue_size=1000,
+                 work_dir=None,
+                 start_method=None,
+                 timeout=300,
+                 verbose=True):
+
+        """
+        ShardedCollector constructor, a worker process is started for each credentials set
+        :param credentials: list of credentials dict, for instance {"consumer_key": .., "consumer_key_secret": ..,
+                            "access_token": .., "access_token_secret": ..}
+        :param statuses: if True the workers collect the statuses too, ignored when collector_factory is given
+        :param collector_factory: function Tweepy API obj --> AccountCollector, building the collector of each worker,
+                                  it must be picklable (a module level function) if the start method is not 'fork'
+        :param api_factory: function credentials --> Tweepy API obj, default authenticate
+        :param filter_account: filtering function for users, applied by the workers
+        :param filter_status: filtering function for statuses, applied by the workers
+        :param queue_size: maximum number of accounts waiting in the queue of each worker, submit blocks beyond it
+        :param work_dir: directory of the worker shard files, if None a temporary directory
+        :param start_method: multiprocessing start method, if None the platform default
+        :param timeout: seconds waited for the workers to reply to a snapshot, the ones busy on a single account
+                        for longer raise WorkerError, if None no limit. Dead workers always raise WorkerError
+        """
+
+        if not credentials:
+            raise ValueError("At least one credentials set is required")
+
+        self.credentials = list(credentials)
+        self.collector_factory = functools.partial(default_collector_factory, statuses=statuses) \
+            if collector_factory is None else collector_factory
+        self.api_factory = api_factory
+        # filters are fixed for the whole run, since they must reach the worker processes
+        self.filter_account = filter_account if filter_account is not None else _accept
+        self.filter_status = filter_status if filter_status is not None else _accept
+        self.queue_size = queue_size
+        self.work_dir = tempfile.mkdtemp(prefix="ptdc_shards_") if work_dir is None else work_dir
+        self._context = multiprocessing.get_context(start_method)
+        self.timeout = timeout
+        self._verbose = verbose
+        self.verboseprint = print if self._verbose else lambda *args, **kwargs: None
+
+        self._workers = []
+        self._tasks = []
+        self._controls = []
+        self._results = None
+        self._sequence = 0
+        # shard index -> (n_collected, n_errors), as last replied by the worker
+        self._counts = {}
+        self.count = 0
+        self.n_collected = 0
+        self.n_errors = 0
+
+    @property
+    def n_workers(self):
+        return len(self.credentials)
+
+    def is_running(self):
+        return bool(self._workers)
+
+    def start(self):
+
+        """ Start the worker processes """
+
+        if self.is_running():
+            return
+        os.makedirs(self.work_dir, exist_ok=True)
+        self._results = self._context.Queue()
+        for index, credentials in enumerate(self.credentials):
+            tasks = self._context.Queue(maxsize=self.queue_size)
+            controls = self._context.Queue()
+            worker = self._context.Process(target=_worker,
+                                           name="ptdc-shard-{}".format(index),
+                                           args=(index, credentials, self.api_factory, self.collector_factory,
+                                                 self.filter_account, self.filter_status, tasks, controls,
+                                                 self._results, _shard_path(self.work_dir, index)),
+                                           daemon=True)
+            worker.start()
+            self._tasks.append(tasks)
+            self._controls.append(controls)
+            self._workers.append(worker)
+        logging.debug("{} collection workers started..".format(self.n_workers))
+
+    def submit(self, account, n_statuses, user_id=None):
+
+        """
+        Assign an account to the worker of its shard
+        :param account: screen_name or id of the account
+        :param n_statuses: number of account's statuses to collect
+        :param user_id: id of the account, used as shard key, if None the account itself is the key
+        """
+
+        self.start()
+        shard = shard_of(account if user_id is None else user_id, self.n_workers)
+        self._put(shard, ("collect", account, n_statuses))
+        self.count += 1
+
+    def process(self,
+                screen_name,
+                n_statuses,
+                filter_account=None,
+                filter_status=None,
+                user_id=None):
+
+        """
+        Same interface of Collector.process, so that the coordinator can be used by the OnlineStreamer,
+        the filters are the ones given to the constructor
+        :param screen_name: screen_name of the user streamed
+        :param n_statuses: number of statuses to be collected for that user
+        :param user_id: id of the user streamed, used as shard key so that a renamed account stays in its shard,
+                        if None the screen_name is the key
+        """
+
+        self.submit(account=screen_name, n_statuses=n_statuses, user_id=user_id)
+
+    def collect_accounts(self, accounts, n_statuses):
+
+        """
+        Submit a list of accounts, the collection goes on in background, @see merge and save_dataset
+        :param accounts: list of screen_names or ids
+        :param n_statuses: number of statuses to collect for each account
+        """
+
+        for account in accounts:
+            self.submit(account=account, n_statuses=n_statuses)
+
+    def _check_worker(self, index):
+
+        """
+        Raise WorkerError if a worker process is not alive
+        :param index: shard index
+        """
+
+        worker = self._workers[index]
+        if not worker.is_alive():
+            raise WorkerError("Worker {} died with exit code {}".format(index, worker.exitcode))
+
+    def _put(self, index, task):
+
+        """
+        Put a task in the queue of a worker, waiting for room while the worker is alive
+        :param index: shard index
+        :param task: tuple (command, account or sequence number, n_statuses)
+        """
+
+        while True:
+            self._check_worker(index)
+            try:
+                self._tasks[index].put(task, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _gather(self, command, wait=False):
+
+        """
+        Send a command to all the workers and wait their replies
+        :param command: 'save' or 'stop'
+        :param wait: if True, or if the command is 'stop', the command is served once the tasks already queued
+                     are done, otherwise each worker serves it as soon as its current account is done
+        :raise WorkerError: if a worker died, or did not reply to a snapshot within timeout seconds
+        """
+
+        self._sequence += 1
+        sequence = self._sequence
+        wait = wait or command == "stop"
+        for index in range(self.n_workers):
+            if wait:
+                self._put(index, (command, sequence, 0))
+            else:
+                self._check_worker(index)
+                self._controls[index].put((command, sequence))
+
+        deadline = None if wait or self.timeout is None else time.monotonic() + self.timeout
+        pending = set(range(self.n_workers))
+        dead = set()
+        while pending:
+            try:
+                index, reply_sequence, collected, errors = self._results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                # a worker found dead gets one more poll, its last reply may still be in the pipe
+                for index in dead & pending:
+                    self._check_worker(index)
+                dead = {index for index in pending if not self._workers[index].is_alive()}
+                if deadline is not None and time.monotonic() > deadline:
+                    raise WorkerError("Workers {} did not reply within {} seconds".format(sorted(pending),
+                                                                                          self.timeout))
+                continue
+            self._counts[index] = (collected, errors)
+            if reply_sequence == sequence:
+                pending.discard(index)
+        self.n_collected = sum(counts[0] for counts in self._counts.values())
+        self.n_errors = sum(counts[1] for counts in self._counts.values())
+
+    def merge(self, wait=False):
+
+        """
+        Merge the datasets of the workers
+        :param wait: if True the accounts already submitted are waited, otherwise the snapshot holds the accounts
+                     collected so far, without waiting the queued ones
+        :return: tuple of DataFrame (accounts, statuses), statuses is None if not collected
+        """
+
+        if self.is_running():
+            self._gather("save", wait=wait)
+        accounts, statuses = [], []
+        for index in range(self.n_workers):
+            path = _shard_path(self.work_dir, index)
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as file:
+                shard = pickle.load(file)
+            accounts.append(shard["accounts"])
+            if shard["statuses"] is not None:
+                statuses.append(shard["statuses"])
+        if not accounts:
+            return pd.DataFrame(), None
+        return pd.concat(accounts, ignore_index=True, sort=False), \
+            pd.concat(statuses, ignore_index=True, sort=False) if statuses else None
+
+    def dataset(self):
+        return self.merge()[0]
+
+    def save_dataset(self, path, sep='\t', wait=False):
+
+        """
+        Save the merged datasets, with the same layout of AccountCollector.save_dataset
+        :param path: Accounts file's path, the statuses are saved at <path without extension>_statuses.csv
+        :param sep: separator of csv
+        :param wait: if True the accounts already submitted are waited, @see merge
+        """
+
+        accounts, statuses = self.merge(wait=wait)
+        if statuses is not None:
+            statuses_path = path[:path.rfind(".")] + "_statuses.csv"
+            statuses.to_csv(path_or_buf=statuses_path, sep=sep, index=False)
+            self.verboseprint("Dataset successfully saved at {}.".format(statuses_path))
+        accounts.to_csv(path_or_buf=path, sep=sep, index=False)
+
+        self.verboseprint("Dataset successfully saved at {}.".format(path))
+        logging.debug("Dataset saved at {}..".format(path))
+
+    def get_state(self):
+
+        """
+        Returns the coordinator state, used by checkpoints, the worker datasets are saved in their shard files
+        without waiting the queued accounts
+        :return: picklable dict
+        """
+
+        if self.is_running():
+            self._gather("save")
+        return {"count": self.count, "work_dir": self.work_dir}
+
+    def set_state(self, state):
+
+        """
+        Restore a state previously returned by get_state, the workers must not be started yet,
+        they reload their shard files when started
+        :param state: dict
+        """
+
+        self.count = state["count"]
+        self.work_dir = state["work_dir"]
+
+    def close(self):
+
+        """ Wait the accounts already submitted, save the worker datasets and stop the workers """
+
+        if not self.is_running():
+            return
+        try:
+            self._gather("stop")
+        except WorkerError:
+            # the workers left would never receive the stop task
+            for worker in self._workers:
+                if worker.is_alive():
+                    worker.terminate()
+            raise
+        finally:
+            for worker in self._workers:
+                worker.join()
+            self._workers, self._tasks, self._controls = [], [], []
+        self.verboseprint("{} accounts collected by {} workers, {} errors.".format(self.n_collected, self.n_workers,
+                                                                                 self.n_errors))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _accept(x):
+    return True
@@ -0,0 +1,257 @@
+"""
+Sketch module, it contains probabilistic data structures used for keeping bounded memory during collection.
+BloomFilter -> compact set membership, with no false negatives and a configurable false positive rate
+CountMinSketch -> approximated counters over an unbounded key space, never underestimating
+SpaceSaving -> approximated top-k heavy hitters in bounded memory
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import hashlib
+import heapq
+import math
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash_pair(key):
+
+    """
+    Compute two independent 64 bits hashes of a key, stable across processes
+    :param key: int or str key
+    :return: tuple of two ints
+    """
+
+    digest = hashlib.blake2b(str(key).encode("utf8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def _indices(key, n_hashes, size):
+
+    """
+    Compute the positions of a key through double hashing
+    :param key: int or str key
+    :param n_hashes: number of positions
+    :param size: size of the addressed space
+    :return: list of ints
+    """
+
+    h1, h2 = _hash_pair(key)
+    return [((h1 + i * h2) & _MASK64) % size for i in range(n_hashes)]
+
+
+class BloomFilter(object):
+
+    """ Bloom filter over int or str keys, backed by a numpy bit array """
+
+    def __init__(self, capacity, error_rate=0.01):
+
+        """
+        BloomFilter constructor
+        :param capacity: expected number of keys
+        :param error_rate: false positive rate reached when capacity keys are stored
+        """
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self._bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in _indices(key, self.n_hashes, self.n_bits))
+
+    def add(self, key):
+
+        """
+        Add a key to the filter
+        :param key: int or str key
+        :return: True if the key was not (probably) present yet
+        """
+
+        added = False
+        for i in _indices(key, self.n_hashes, self.n_bits):
+            byte, bit = i >> 3, 1 << (i & 7)
+            if not self._bits[byte] & bit:
+                self._bits[byte] |= bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def nbytes(self):
+
+        """ Returns the memory used by the bit array """
+
+        return self._bits.nbytes
+
+    def save(self, path):
+
+        """
+        Save the filter in numpy binary format
+        :param path: file's path
+        """
+
+        np.savez_compressed(path, bits=self._bits,
+                            params=np.array([self.capacity, self.n_bits, self.n_hashes, self.count], dtype=np.int64),
+                            error_rate=np.array([self.error_rate]))
+
+    @classmethod
+    def load(cls, path):
+
+        """
+        Load a filter previously saved
+        :param path: file's path
+        :return: BloomFilter obj
+        """
+
+        with np.load(path) as data:
+            capacity, n_bits, n_hashes, count = (int(x) for x in data["params"])
+            bloom = cls.__new__(cls)
+            bloom.capacity, bloom.n_bits, bloom.n_hashes, bloom.count = capacity, n_bits, n_hashes, count
+            bloom.error_rate = float(data["error_rate"][0])
+            bloom._bits = data["bits"].copy()
+        return bloom
+
+
+class CountMinSketch(object):
+
+    """ Count-min sketch over int or str keys """
+
+    def __init__(self, width=2 ** 16, depth=4):
+
+        """
+        CountMinSketch constructor, the error is at most 2 * total / width with probability 1 - 0.5 ** depth
+        :param width: number of counters of each row
+        :param depth: number of rows, i.e. of hash functions
+        """
+
+        self.width = width
+        self.depth = depth
+        self._table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+        self.total = 0
+
+    def add(self, key, count=1):
+
+        """
+        Increment the counter of a key
+        :param key: int or str key
+        :param count: increment
+        :return: the estimated count of the key after the increment
+        """
+
+        cols = _indices(key, self.depth, self.width)
+        self._table[self._rows, cols] += count
+        self.total += count
+        return int(self._table[self._rows, cols].min())
+
+    def estimate(self, key):
+
+        """
+        Returns the estimated count of a key, never lower than the real one
+        :param key: int or str key
+        """
+
+        return int(self._table[self._rows, _indices(key, self.depth, self.width)].min())
+
+    def merge(self, other):
+
+        """
+        Add the counters of another sketch with the same shape
+        :param other: CountMinSketch obj
+        """
+
+        self._table += other._table
+        self.total += other.total
+
+    def clear(self):
+
+        """ Reset all the counters """
+
+        self._table[:] = 0
+        self.total = 0
+
+
+class SpaceSaving(object):
+
+    """ Space-saving heavy hitters summary, tracking at most capacity keys """
+
+    def __init__(self, capacity=1000):
+
+        """
+        SpaceSaving constructor, every key with a frequency higher than total / capacity is tracked
+        :param capacity: maximum number of keys tracked
+        """
+
+        self.capacity = capacity
+        # key -> [count, error]
+        self._counters = {}
+        # min-heap of (count, key), stale entries are skipped lazily
+        self._heap = []
+        self.total = 0
+
+    def __len__(self):
+        return len(self._counters)
+
+    def add(self, key, count=1):
+
+        """
+        Increment the counter of a key, replacing the minimum one if the key is not tracked and the summary is full
+        :param key: hashable key
+        :param count: increment
+        """
+
+        self.total += count
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += count
+        elif len(self._counters) < self.capacity:
+            counter = self._counters[key] = [count, 0]
+        else:
+            minimum, evicted = self._pop_min()
+            del self._counters[evicted]
+            counter = self._counters[key] = [minimum + count, minimum]
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], k) for k, c in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+
+        """
+        Remove the current minimum entry from the heap
+        :return: tuple (count, key)
+        """
+
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+    def counts(self):
+
+        """
+        Returns the tracked counters
+        :return: dict <key, (count, error)>, the real count is in [count - error, count]
+        """
+
+        return {key: (counter[0], counter[1]) for key, counter in self._counters.items()}
+
+    def top(self, k=10):
+
+        """
+        Returns the k most frequent keys
+        :param k: number of keys
+        :return: list of tuples (key, count), sorted by decreasing count
+        """
+
+        return heapq.nlargest(k, ((key, counter[0]) for key, counter in self._counters.items()), key=lambda x: x[1])
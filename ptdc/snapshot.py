@@ -0,0 +1,264 @@
+"""
+Snapshot module, it contains the SnapshotStore class used for tracking accounts over time.
+SnapshotStore -> keeps the latest feature vector of every account and records, crawl after crawl,
+                 only the features that actually changed, so that the state of the accounts
+                 at any point in time can be rebuilt from the change log.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import json
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from ptdc.support import get_time
+
+
+def _to_builtin(value):
+
+    """
+    Convert numpy/pandas scalars into plain python objects, so that they can be json serialized
+    :param value: value to convert
+    :return: json serializable value
+    """
+
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _normalize(value):
+
+    """
+    Convert a feature value into the one read back from a saved change log, so that the values recorded
+    and the loaded ones compare equal (e.g. datetimes become strings, tuples lists)
+    :param value: value to convert
+    :return: json value
+    """
+
+    value = _to_builtin(value)
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    return json.loads(json.dumps(value, default=str))
+
+
+def _same(old, new):
+
+    """
+    Checks whether two feature values are equal, treating missing values (None/NaN) as equal
+    :param old: previous value
+    :param new: current value
+    :return: True if the value did not change
+    """
+
+    old_missing = old is None or (isinstance(old, float) and math.isnan(old))
+    new_missing = new is None or (isinstance(new, float) and math.isnan(new))
+    if old_missing or new_missing:
+        return old_missing and new_missing
+    try:
+        return bool(old == new)
+    except ValueError:
+        # array-like values
+        return list(old) == list(new)
+
+
+class SnapshotStore(object):
+
+    """ Longitudinal accounts store, keyed by account id, keeping only change-only delta rows """
+
+    DELTA_COLUMNS = ["id", "timestamp", "feature", "value"]
+
+    def __init__(self,
+                 id_feature="id",
+                 time_feature="profile_crawled",
+                 features=None,
+                 ignore=None,
+                 verbose=True):
+
+        """
+        SnapshotStore constructor
+        :param id_feature: name of the feature holding the account id
+        :param time_feature: name of the feature holding the crawling time, used as snapshot timestamp
+                             if present in the row, otherwise the current time is used
+        :param features: features to track, if None all features of the rows are tracked
+        :param ignore: features never tracked, by default the id and time features
+        :param verbose: verbosity
+        """
+
+        self.id_feature = id_feature
+        self.time_feature = time_feature
+        self._features = None if features is None else list(features)
+        self._ignore = {id_feature, time_feature} if ignore is None else set(ignore) | {id_feature}
+        self._verbose = verbose
+        self.verboseprint = print if self._verbose else lambda *args: None
+
+        # latest known feature vector for each account -> <id, <feature, value>>
+        self._latest = {}
+
+        # change log, one entry per changed feature: (id, timestamp, feature, value)
+        self._deltas = []
+
+        # number of delta rows already flushed on disk by save
+        self._saved = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def __contains__(self, account_id):
+        return account_id in self._latest
+
+    def n_changes(self):
+
+        """ Returns the number of delta rows recorded so far """
+
+        return len(self._deltas)
+
+    def latest(self, account_id):
+
+        """
+        Returns the latest known feature vector of an account
+        :param account_id: id of the account
+        :return: dict <feature, value> or None if the account has never been seen
+        """
+
+        state = self._latest.get(account_id)
+        return None if state is None else dict(state)
+
+    def update(self, row, timestamp=None):
+
+        """
+        Record a new observation of an account, storing only the features that changed
+        since the previous observation (all of them on the first one)
+        :param row: pandas Series or dict <feature, value> containing the account features
+        :param timestamp: observation time in seconds, if None uses the row time feature or the current time
+        :return: number of changed features recorded
+        """
+
+        row = dict(row)
+        account_id = _to_builtin(row[self.id_feature])
+
+        if timestamp is None:
+            timestamp = row.get(self.time_feature)
+            timestamp = get_time() if timestamp is None else _to_builtin(timestamp)
+
+        features = self._features if self._features is not None else row.keys()
+        state = self._latest.setdefault(account_id, {})
+
+        changed = 0
+        for feature in features:
+            if feature in self._ignore or feature not in row:
+                continue
+            value = _normalize(row[feature])
+            if feature in state and _same(state[feature], value):
+                continue
+            state[feature] = value
+            self._deltas.append((account_id, timestamp, feature, value))
+            changed += 1
+
+        logging.debug("Account {}: {} features changed..".format(account_id, changed))
+        return changed
+
+    def update_dataset(self, dataset, timestamp=None):
+
+        """
+        Record a whole crawl, i.e. every row of a collected dataset
+        :param dataset: pandas DataFrame, for instance AccountCollector.dataset()
+        :param timestamp: crawl time in seconds, if None the time feature of each row is used
+        :return: number of changed features recorded
+        """
+
+        changed = 0
+        for _, row in dataset.iterrows():
+            changed += self.update(row, timestamp=timestamp)
+
+        self.verboseprint("Snapshot updated: {} accounts, {} changes..".format(dataset.shape[0], changed))
+        return changed
+
+    def changes(self, account_id=None, since=None):
+
+        """
+        Returns the change log
+        :param account_id: if not None returns only the changes of this account
+        :param since: if not None returns only the changes recorded after this timestamp
+        :return: pandas DataFrame with columns id, timestamp, feature, value
+        """
+
+        deltas = self._deltas
+        if account_id is not None:
+            deltas = [d for d in deltas if d[0] == account_id]
+        if since is not None:
+            deltas = [d for d in deltas if d[1] > since]
+        return pd.DataFrame(deltas, columns=SnapshotStore.DELTA_COLUMNS)
+
+    def state_at(self, timestamp=None):
+
+        """
+        Rebuild the state of all accounts at a given point in time
+        :param timestamp: point in time in seconds, if None returns the latest state
+        :return: pandas DataFrame, one row per account known at that time
+        """
+
+        if timestamp is None:
+            states = self._latest
+        else:
+            states = {}
+            # deltas are appended in crawling order, last write wins
+            for account_id, ts, feature, value in self._deltas:
+                if ts <= timestamp:
+                    states.setdefault(account_id, {})[feature] = value
+
+        rows = [dict({self.id_feature: account_id}, **state) for account_id, state in states.items()]
+        return pd.DataFrame(rows)
+
+    def save(self, path):
+
+        """
+        Append the delta rows not saved yet at the given location, as json lines,
+        so that the write volume grows with the actual changes
+        :param path: change log file's path
+        """
+
+        with open(path, "a") as file:
+            for account_id, ts, feature, value in self._deltas[self._saved:]:
+                file.write(json.dumps({"id": account_id, "timestamp": ts, "feature": feature, "value": value},
+                                      default=str))
+                file.write("\n")
+
+        logging.debug("Saved {} changes at {}..".format(len(self._deltas) - self._saved, path))
+        self._saved = len(self._deltas)
+        self.verboseprint("Snapshot successfully saved at {}.".format(path))
+
+    def load(self, path):
+
+        """
+        Load a change log previously written by save, replaying it on the current store
+        :param path: change log file's path
+        """
+
+        if not os.path.exists(path):
+            logging.warning("Snapshot file {} not found..".format(path))
+            return
+
+        loaded = []
+        with open(path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                delta = json.loads(line)
+                loaded.append((delta["id"], delta["timestamp"], delta["feature"], delta["value"]))
+
+        # the loaded deltas are already on disk, the ones recorded and not saved yet come after them
+        pending = self._deltas[self._saved:]
+        self._deltas = self._deltas[:self._saved] + loaded + pending
+        self._saved += len(loaded)
+        self._latest = {}
+        for account_id, _, feature, value in self._deltas:
+            self._latest.setdefault(account_id, {})[feature] = value
+        logging.debug("Loaded {} changes from {}..".format(len(loaded), path))
@@ -0,0 +1,318 @@
+"""
+Storage module, it contains the classes used by the collectors for storing their datasets.
+FrameStore -> in-memory storage made of DataFrame chunks, appending a chunk or a row never copies
+              the data already stored, chunks are concatenated only when the whole dataset is requested.
+SQLiteStore -> local SQLite table keyed by id, rows are upserted in batched transactions, common lookup
+               columns are indexed and subsets can be exported without loading the whole dataset.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class FrameStore(object):
+
+    """ In-memory chunked dataset storage """
+
+    persistent = False  # the data does not survive the process, checkpoints must hold it
+
+    def __init__(self, columns):
+
+        """
+        FrameStore constructor
+        :param columns: dataset columns
+        """
+
+        self.columns = pd.Index(columns)
+        # stored DataFrame chunks, never copied on append
+        self._chunks = []
+        # rows appended one at a time, turned into a chunk on the next read
+        self._rows = []
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, data):
+
+        """
+        Append new data
+        :param data: pandas Series (a single row) or DataFrame (a chunk, stored as it is and shared with the caller)
+        :return: the stored data
+        """
+
+        if isinstance(data, pd.Series):
+            self._rows.append(data)
+            self._length += 1
+        elif data.shape[0] > 0:
+            self._flush_rows()
+            self._chunks.append(data)
+            self._length += data.shape[0]
+        return data
+
+    def _flush_rows(self):
+
+        """ Turn the buffered rows into a chunk """
+
+        if self._rows:
+            self._chunks.append(pd.DataFrame(self._rows, columns=self.columns, dtype=object))
+            self._rows = []
+
+    def chunks(self):
+
+        """
+        Returns the stored chunks, without copying them
+        :return: list of DataFrame
+        """
+
+        self._flush_rows()
+        return list(self._chunks)
+
+    def frame(self):
+
+        """
+        Returns the whole dataset, the chunks are concatenated once and replaced by the result
+        :return: pandas DataFrame
+        """
+
+        self._flush_rows()
+        if not self._chunks:
+            return pd.DataFrame(columns=self.columns)
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks, ignore_index=True, sort=False)]
+        return self._chunks[0]
+
+    def flush(self):
+
+        """ Nothing to flush, kept for interface compatibility with the persistent stores """
+
+        pass
+
+    def clear(self):
+
+        """ Remove all the data """
+
+        self._chunks = []
+        self._rows = []
+        self._length = 0
+
+
+class SQLiteStore(object):
+
+    """ SQLite dataset storage, a table keyed by id with upserts, thread safe """
+
+    persistent = True
+
+    # value kinds of the columns that need to be decoded when read back
+    JSON = "json"
+    DATETIME = "datetime"
+
+    def __init__(self,
+                 path,
+                 table,
+                 key="id",
+                 indexes=("user_id", "created_at", "lang"),
+                 batch_size=500,
+                 timeout=30):
+
+        """
+        SQLiteStore constructor, the table is created when the collector binds its columns, @see init_columns
+        :param path: database file's path
+        :param table: table name, for instance 'accounts' or 'statuses'
+        :param key: primary key column, re-collected rows with the same key replace the old ones
+        :param indexes: columns to index, the ones not in the dataset are ignored
+        :param batch_size: number of rows written in a single transaction
+        :param timeout: seconds waited for a lock held by another writer
+        """
+
+        self.path = path
+        self.table = table
+        self.key = key
+        self.indexes = tuple(indexes)
+        self.batch_size = batch_size
+        self.columns = None
+
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        # write ahead log, readers do not block the writer
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS _ptdc_columns "
+                                     "(tbl TEXT, col TEXT, kind TEXT, PRIMARY KEY (tbl, col))")
+        self._lock = threading.RLock()
+        self._rows = []
+        # column -> kind, the new ones are written with the next batch
+        self._kinds = {}
+        self._new_kinds = {}
+
+    def init_columns(self, columns):
+
+        """
+        Bind the dataset columns, creating the table and its indexes if they do not exist
+        :param columns: dataset columns, key included
+        :return: this store
+        """
+
+        self.columns = pd.Index(columns)
+        if self.key not in self.columns:
+            raise ValueError("Key column {} not in the dataset columns".format(self.key))
+
+        definitions = ", ".join("{} {}".format(_quote(c), "PRIMARY KEY" if c == self.key else "") for c in self.columns)
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS {} ({})".format(_quote(self.table), definitions))
+            for column in self.indexes:
+                if column in self.columns and column != self.key:
+                    self._connection.execute("CREATE INDEX IF NOT EXISTS {} ON {} ({})".format(
+                        _quote("ix_{}_{}".format(self.table, column)), _quote(self.table), _quote(column)))
+            self._kinds = dict(self._connection.execute("SELECT col, kind FROM _ptdc_columns WHERE tbl = ?",
+                                                        (self.table,)).fetchall())
+        return self
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM {}".format(_quote(self.table))).fetchone()[0]
+
+    def append(self, data):
+
+        """
+        Upsert new data, written when batch_size rows are buffered
+        :param data: pandas Series (a single row) or DataFrame
+        :return: the data
+        """
+
+        with self._lock:
+            if isinstance(data, pd.Series):
+                self._rows.append(self._encode_row(data.reindex(self.columns).tolist()))
+            else:
+                rows = data.reindex(columns=self.columns).itertuples(index=False, name=None)
+                self._rows.extend(self._encode_row(list(row)) for row in rows)
+            if len(self._rows) >= self.batch_size:
+                self.flush()
+        return data
+
+    def _encode_row(self, values):
+
+        """
+        Convert the values of a row into SQLite values, recording the kind of the converted columns
+        :param values: list of values, ordered as columns
+        :return: tuple
+        """
+
+        encoded = []
+        for column, value in zip(self.columns, values):
+            if isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, (list, dict, tuple, np.ndarray)):
+                value = json.dumps(value.tolist() if isinstance(value, np.ndarray) else value, default=str)
+                self._set_kind(column, SQLiteStore.JSON)
+            elif isinstance(value, datetime):
+                value = value.isoformat(sep=" ")
+                self._set_kind(column, SQLiteStore.DATETIME)
+            elif isinstance(value, float) and value != value:
+                value = None
+            elif value is not None and not isinstance(value, (int, float, str, bytes)):
+                value = str(value)
+            encoded.append(value)
+        return tuple(encoded)
+
+    def _set_kind(self, column, kind):
+        if self._kinds.get(column) != kind:
+            self._kinds[column] = self._new_kinds[column] = kind
+
+    def flush(self):
+
+        """ Write the buffered rows in a single transaction """
+
+        with self._lock:
+            if not self._rows:
+                return
+            statement = "INSERT OR REPLACE INTO {} ({}) VALUES ({})".format(
+                _quote(self.table), ", ".join(_quote(c) for c in self.columns), ", ".join("?" * len(self.columns)))
+            with self._connection:
+                self._connection.executemany(statement, self._rows)
+                self._connection.executemany("INSERT OR REPLACE INTO _ptdc_columns VALUES (?, ?, ?)",
+                                             [(self.table, c, k) for c, k in self._new_kinds.items()])
+            logging.debug("{} rows written into {}..".format(len(self._rows), self.table))
+            self._rows = []
+            self._new_kinds = {}
+
+    def query(self, columns=None, where=None, params=(), order_by=None, limit=None):
+
+        """
+        Export a subset of the dataset
+        :param columns: columns to export, if None all of them
+        :param where: SQL condition, for instance "lang = ? AND created_at >= ?"
+        :param params: parameters of the condition
+        :param order_by: SQL ordering, for instance "created_at DESC"
+        :param limit: maximum number of rows
+        :return: pandas DataFrame
+        """
+
+        self.flush()
+        columns = list(self.columns) if columns is None else list(columns)
+        sql = "SELECT {} FROM {}".format(", ".join(_quote(c) for c in columns), _quote(self.table))
+        if where is not None:
+            sql += " WHERE {}".format(where)
+        if order_by is not None:
+            sql += " ORDER BY {}".format(order_by)
+        if limit is not None:
+            sql += " LIMIT {:d}".format(limit)
+
+        with self._lock:
+            frame = pd.read_sql_query(sql, self._connection, params=params)
+        for column in columns:
+            kind = self._kinds.get(column)
+            if kind == SQLiteStore.JSON:
+                frame[column] = [json.loads(v) if v is not None else None for v in frame[column]]
+            elif kind == SQLiteStore.DATETIME:
+                frame[column] = pd.to_datetime(frame[column])
+        return frame
+
+    def frame(self):
+
+        """
+        Returns the whole dataset
+        :return: pandas DataFrame
+        """
+
+        return self.query()
+
+    def chunks(self):
+
+        """ Returns the whole dataset as a single chunk """
+
+        return [self.frame()]
+
+    def clear(self):
+
+        """ Remove all the data """
+
+        with self._lock, self._connection:
+            self._rows = []
+            self._connection.execute("DELETE FROM {}".format(_quote(self.table)))
+
+    def close(self):
+
+        """ Flush the buffered rows and close the database """
+
+        self.flush()
+        self._connection.close()
+
+
+def _quote(name):
+
+    """
+    Quote an SQL identifier
+    :param name: identifier
+    """
+
+    return '"{}"'.format(str(name).replace('"', '""'))
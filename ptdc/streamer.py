@@ -9,12 +9,16 @@ OnlineStreamer -> makes an online collection, printing the streamed ata into a j
 """
 
 import logging
+import os
+import pickle
 import socket
+import threading
 
 import tweepy
 from urllib3 import exceptions
 
 from ptdc import support
+from ptdc.connection import ConnectionManager
 
 
 class OnlineStreamer(tweepy.StreamListener):
@@ -31,6 +35,12 @@ class OnlineStreamer(tweepy.StreamListener):
                  filter_status=lambda x: True,
                  attempts=None,
                  backup=None,
+                 checkpoint_path=None,
+                 checkpoint=None,
+                 unique_users=False,
+                 connection=None,
+                 admission=None,
+                 trends=None,
                  verbose=True):
 
         """
@@ -47,6 +57,16 @@ class OnlineStreamer(tweepy.StreamListener):
         :param attempts: number of reconnection attempts to perform in case of streaming failure, first connection
                          excluded, if None always retry to reconnect
         :param backup: every how many seconds to backup, if None no backup is scheduled
+        :param checkpoint_path: checkpoint file's path, if None no checkpoint is saved, @see resume
+        :param checkpoint: every how many seconds to checkpoint, if None the checkpoint is saved only
+                           when the streaming ends or is interrupted
+        :param unique_users: if True each user is collected once, even if streamed many times
+        :param connection: ConnectionManager defining the reconnection policy, if None the default one is used
+        :param admission: AdmissionController deciding which streamed users get collected, if not None the
+                          collection runs on a worker thread, decoupled from the stream, while the raw data
+                          is still entirely written on json_path. If None every streamed user is collected
+                          on the streaming thread
+        :param trends: optional TrendCounter fed with every streamed status, it can be queried at any time
         :param verbose: verbosity
         """
 
@@ -61,21 +81,42 @@ class OnlineStreamer(tweepy.StreamListener):
         self.n_statuses = n_statuses
         self.attempts = attempts
         self.backup = backup
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = checkpoint
+        self.unique_users = unique_users
+        self.connection = connection if connection is not None else ConnectionManager()
+        self.admission = admission
+        self.trends = trends
         self._verbose = verbose
         # verbosity function
         self.verboseprint = print if self._verbose else lambda *args: None
 
         # collector needed for online data collection
         self.collector = collector
+        if hasattr(self.collector, "set_page_hook"):
+            # checkpoints are saved on timeline page boundaries too, so that long timelines are not lost
+            self.collector.set_page_hook(self._on_page)
 
         self.start_time = 0
         self.last_backup = 0
         self.count = 0
         self.start_time = support.get_time()
         self.last_backup = self.start_time
+        self.last_checkpoint = self.start_time
         self.file = None
         self._closed = False
 
+        # ids of the users already processed
+        self.processed = set()
+        # screen_name of the user being processed, if any
+        self._in_flight = None
+        self._in_flight_id = None
+        # kind of the error that closed the last connection, if any
+        self._connection_error = None
+        # collection worker, used with admission control
+        self._worker = None
+        self._stop_worker = threading.Event()
+
     def on_connect(self):
 
         """
@@ -88,7 +129,9 @@ class OnlineStreamer(tweepy.StreamListener):
 
         logging.debug("Streaming started at {}".format(support.get_date()))
 
-        if self.json_path is not None:
+        self.connection.connected()
+
+        if self.json_path is not None and self.file is None:
             # open or create a new file
             try:
                 self.file = open(self.json_path, "a")
@@ -102,6 +145,8 @@ class OnlineStreamer(tweepy.StreamListener):
 
         logging.debug("New data received..")
 
+        self.connection.activity()
+
         # if enough time was passed stop streaming or enough data was collected
         if self._closed:
             # if file has been opened, close it
@@ -129,19 +174,108 @@ class OnlineStreamer(tweepy.StreamListener):
 
         """ called when raw data is received from stream """
 
-        if self.check_backup():
-            self.last_backup = support.get_time()
-            self.collector.save_dataset(path=self.backup_path)
+        if self.trends is not None:
+            self.trends.add_status(status)
 
-        self.collector.process(screen_name=status.user.screen_name,
-                               filter_account=self.filter_user,
-                               filter_status=self.filter_status,
-                               n_statuses=self.n_statuses)
+        if self.admission is None:
+            self._maintain()
+            if not self.unique_users or status.user.id not in self.processed:
+                self._process(screen_name=status.user.screen_name, user_id=status.user.id)
+                self.processed.add(status.user.id)
+        elif not self.unique_users or status.user.id not in self.processed:
+            # the collection runs on the worker thread, only the admitted users get collected
+            self.admission.offer(status)
 
         self.count += 1
         if (self.data_limit is not None and self.count > self.data_limit) or \
                 (self.time_limit is not None and (support.get_time() - self.start_time) > self.time_limit):
             self._closed = True
+            if self.checkpoint_path is not None and self.admission is None:
+                self.save_checkpoint()
+
+    def _maintain(self):
+
+        """ Backup and checkpoint, if it is time to """
+
+        if self.check_backup():
+            self.last_backup = support.get_time()
+            self.collector.save_dataset(path=self.backup_path)
+
+        if self.check_checkpoint():
+            self.save_checkpoint()
+
+    def _on_page(self, screen_name):
+
+        """
+        Called by the collector after each timeline page collected, checkpoint if it is time to
+        :param screen_name: screen_name of the account being collected
+        """
+
+        if self.check_checkpoint():
+            self.save_checkpoint()
+
+    def _collect_loop(self):
+
+        """ Worker thread body, collects the users admitted by the admission controller """
+
+        while not self._stop_worker.is_set():
+            item = self.admission.take(timeout=1)
+            if item is None:
+                continue
+            user_id, screen_name = item
+            try:
+                self._process(screen_name=screen_name, user_id=user_id)
+            except tweepy.TweepError as e:
+                logging.warning(e)
+                self._in_flight = None
+            self.processed.add(user_id)
+            self._maintain()
+
+    def _start_worker(self):
+
+        """ Start the collection worker thread, if admission control is enabled """
+
+        if self.admission is not None and self._worker is None:
+            self._stop_worker.clear()
+            self._worker = threading.Thread(target=self._collect_loop, daemon=True)
+            self._worker.start()
+
+    def _stop_worker_thread(self):
+
+        """ Stop the collection worker thread after its current user, the pending ones stay buffered """
+
+        if self._worker is not None:
+            self._stop_worker.set()
+            self._worker.join()
+            self._worker = None
+            if self.checkpoint_path is not None:
+                self.save_checkpoint()
+            stats = self.admission.stats()
+            self.verboseprint("Admission: {}".format(stats))
+            logging.debug("Admission stats: {}".format(stats))
+
+    def _process(self, screen_name, user_id=None):
+
+        """
+        Collect a streamed user, saving a checkpoint if the process is interrupted meanwhile,
+        so that its partial collection can be resumed
+        :param screen_name: screen_name of the user streamed
+        :param user_id: id of the user streamed, if known
+        """
+
+        self._in_flight = screen_name
+        self._in_flight_id = user_id
+        try:
+            self.collector.process(screen_name=screen_name,
+                                   filter_account=self.filter_user,
+                                   filter_status=self.filter_status,
+                                   n_statuses=self.n_statuses,
+                                   user_id=user_id)
+        except (KeyboardInterrupt, SystemExit):
+            if self.checkpoint_path is not None:
+                self.save_checkpoint()
+            raise
+        self._in_flight = None
 
     def on_error(self, status_code):
 
@@ -151,17 +285,46 @@ class OnlineStreamer(tweepy.StreamListener):
         if status_code == 401:
             # UNAUTHORIZED
             raise tweepy.TweepError(reason="Missing or incorrect authentication credentials", api_code=status_code)
-        elif status_code == 420:
-            # RATE LIMIT
-            raise tweepy.RateLimitError(reason="The request limit for this resource has been reached")
-        else:
-            raise tweepy.TweepError("Unhandled exception: {}".format(status_code), api_code=status_code)
+
+        # close the connection, stream will reconnect after the proper backoff
+        self._connection_error = ConnectionManager.THROTTLE if status_code == 420 else ConnectionManager.HTTP
+        return False
+
+    def on_timeout(self):
+
+        """Called when nothing, not even a keep-alive, has been received for stall_timeout seconds"""
+
+        logging.warning("Stream stalled, no data received for {} seconds".format(self.connection.stall_timeout))
+        self._connection_error = ConnectionManager.STALL
+        return False
+
+    def keep_alive(self):
+
+        """Called when a keep-alive newline is received"""
+
+        self.connection.activity()
 
     def on_exception(self, exception):
 
-        """Called when an unhandled exception occurs."""
+        """Called when an unhandled exception occurs, the exception is then re-raised to stream"""
+
+        logging.debug("Stream exception: {}".format(exception))
+        if self._connection_error is None:
+            self._connection_error = self._error_kind(exception)
 
-        pass
+    @staticmethod
+    def _error_kind(exception):
+
+        """
+        Returns the ConnectionManager error kind of an exception that closed the connection,
+        read timeouts mean that nothing, not even a keep-alive, has been received for stall_timeout seconds
+        :param exception: Exception obj
+        :return: STALL or NETWORK
+        """
+
+        if isinstance(exception, (socket.timeout, exceptions.ReadTimeoutError)):
+            return ConnectionManager.STALL
+        return ConnectionManager.NETWORK
 
     def check_backup(self):
 
@@ -169,6 +332,75 @@ class OnlineStreamer(tweepy.StreamListener):
 
         return self.backup is not None and (support.get_time() - self.last_backup) > self.backup
 
+    def check_checkpoint(self):
+
+        """ Checks whether is time to checkpoint the streaming progress """
+
+        return self.checkpoint_path is not None and self.checkpoint is not None and \
+            (support.get_time() - self.last_checkpoint) > self.checkpoint
+
+    def get_state(self):
+
+        """
+        Returns the streaming progress, collector state included
+        :return: picklable dict
+        """
+
+        return {"count": self.count,
+                "elapsed": support.get_time() - self.start_time,
+                "processed": self.processed,
+                "in_flight": self._in_flight,
+                "in_flight_id": self._in_flight_id,
+                "pending": self.admission.pending() if self.admission is not None else [],
+                "collector": self.collector.get_state()}
+
+    def save_checkpoint(self):
+
+        """ Save the streaming progress at checkpoint_path, atomically replacing the previous checkpoint """
+
+        tmp_path = "{}.tmp".format(self.checkpoint_path)
+        with open(tmp_path, "wb") as file:
+            pickle.dump(self.get_state(), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.checkpoint_path)
+
+        self.last_checkpoint = support.get_time()
+        logging.debug("Checkpoint saved at {}..".format(self.checkpoint_path))
+
+    def resume(self):
+
+        """
+        Restore the streaming progress from checkpoint_path, if it exists, completing the collection
+        of the user that was in flight when the checkpoint has been saved, continuing its partial timeline.
+        Must be called before stream
+        :return: True if a checkpoint has been restored
+        """
+
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return False
+
+        with open(self.checkpoint_path, "rb") as file:
+            state = pickle.load(file)
+
+        self.count = state["count"]
+        self.start_time = support.get_time() - state["elapsed"]
+        self.processed = state["processed"]
+        self.collector.set_state(state["collector"])
+
+        self.verboseprint("Resumed from {}: {} statuses processed..".format(self.checkpoint_path, self.count))
+        logging.debug("Resumed from {}..".format(self.checkpoint_path))
+
+        if state["in_flight"] is not None:
+            self._process(screen_name=state["in_flight"], user_id=state.get("in_flight_id"))
+            self.count += 1
+
+        for user_id, screen_name in state.get("pending", []):
+            if self.admission is not None:
+                self.admission.push(user_id, screen_name)
+            else:
+                self._process(screen_name=screen_name, user_id=user_id)
+                self.processed.add(user_id)
+        return True
+
     def stream(self,
                follow=None,
                track=None,
@@ -183,21 +415,45 @@ class OnlineStreamer(tweepy.StreamListener):
         Start the streaming in according to the filtering options passed as parameters
         :params follow, track, is_async, locations, stall_warnings, languages,
                encoding, filter_level: for more details about the parameters see Tweepy Stream class
+        :return: if is_async the thread running the streaming, reconnections included
         """
 
+        if is_async:
+            thread = threading.Thread(target=self.stream,
+                                      kwargs=dict(follow=follow, track=track, is_async=False, locations=locations,
+                                                  stall_warnings=stall_warnings, languages=languages,
+                                                  encoding=encoding, filter_level=filter_level),
+                                      daemon=True)
+            thread.start()
+            return thread
+
+        self._start_worker()
+
         while (self.attempts is None or self.attempts > 0) and not self._closed:
+            self._connection_error = None
             try:
-                stream_ = tweepy.Stream(auth=self.api.auth, listener=self)
-                stream_.filter(follow=follow, track=track, is_async=is_async, locations=locations,
+                # the read timeout detects stalls, i.e. gaps between keep-alive newlines
+                stream_ = tweepy.Stream(auth=self.api.auth, listener=self, timeout=self.connection.stall_timeout)
+                stream_.filter(follow=follow, track=track, is_async=False, locations=locations,
                                stall_warnings=stall_warnings, languages=languages, encoding=encoding,
                                filter_level=filter_level)
             except (socket.timeout, exceptions.ReadTimeoutError, exceptions.ProtocolError, tweepy.TweepError) as e:
                 logging.warning(e)
-                self.verboseprint("Reconnecting...")
-                if self.attempts is not None:
-                    self.attempts -= 1
-                continue
+                if isinstance(e, tweepy.TweepError) and e.api_code == 401:
+                    raise
+                self._connection_error = self._connection_error or self._error_kind(e)
+
+            if self._closed:
+                break
+
+            self.verboseprint("Reconnecting...")
+            self.connection.wait(self._connection_error or ConnectionManager.NETWORK)
+            if self.attempts is not None:
+                self.attempts -= 1
 
         if self.attempts is not None and self.attempts == 0 and not self._closed:
             logging.error("Limit number of attempts reached!!")
 
+        self._stop_worker_thread()
+
+        logging.debug("Connection stats: {}".format(self.connection.stats()))
@@ -5,6 +5,8 @@ Support module provides useful function used for computing attributes and other
 :license: MIT, see LICENSE for more details.
 """
 
+import queue
+import threading
 import time
 from datetime import datetime
 
@@ -134,6 +136,20 @@ def get_retweeted_user_id(status):
     except AttributeError:
         return None
 
+def get_mentioned_user_ids(status):
+
+    """
+    Retrieve the ids of the users mentioned in a status
+    :param status: Tweet object
+    :return: list of user ids
+    """
+
+    try:
+        return [user["id"] for user in status.entities["user_mentions"] if "id" in user]
+    except (AttributeError, KeyError):
+        return []
+
+
 def get_retweeted_status(status):
 
     """
@@ -148,6 +164,71 @@ def get_retweeted_status(status):
         return None
 
 
+def is_valid_id(value):
+
+    """
+    Checks whether a value is a valid account id, i.e. neither None nor NaN
+    :param value: value to check
+    """
+
+    return value is not None and value == value
+
+
+def valid_ids(ids):
+
+    """
+    Filter out missing values from a list of account ids
+    :param ids: iterable of ids
+    :return: list of ids
+    """
+
+    return [x for x in ids if is_valid_id(x)]
+
+
+def prefetch_iterator(iterable, depth=2):
+
+    """
+    Consume an iterable on a background thread, running at most 'depth' items ahead of the caller,
+    so that producing the next item (e.g. a network request) overlaps with the processing of the current one
+    :param iterable: iterable to consume
+    :param depth: maximum number of items produced and not consumed yet
+    :return: generator yielding the same items of the iterable, exceptions are re-raised on the caller thread
+    """
+
+    done = object()
+    items = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def _produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                items.put((item, None))
+            items.put((done, None))
+        except Exception as e:
+            items.put((done, e))
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # the consumer stopped early, let the producer exit
+        stop.set()
+        while producer.is_alive():
+            try:
+                items.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
 def authenticate(consumer_key,
                  consumer_key_secret,
                  access_token,
@@ -0,0 +1,160 @@
+"""
+Trends module, it contains the TrendCounter class used for counting hashtags, mentions and symbols in real time.
+TrendCounter -> sliding window counters, split into time buckets, each one holding a SpaceSaving summary
+                for the top-k queries and a CountMinSketch for the point queries, so that the memory used
+                is bounded whatever the volume of the stream.
+
+:copyright: Copyright since 2019 Lamparelli Andrea, all rights reserved
+:license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+
+from ptdc.sketch import CountMinSketch, SpaceSaving
+
+# field -> function extracting its keys from a tweepy Status obj, hashtags and symbols are case normalized
+default_trend_fields = {"hashtags": lambda status: [ht["text"].lower() for ht in status.entities["hashtags"]],
+                        "user_mentions": lambda status: [user["screen_name"] for user in status.entities["user_mentions"]],
+                        "symbols": lambda status: [sym["text"].upper() for sym in status.entities["symbols"]]}
+
+
+class TrendCounter(object):
+
+    """ Windowed top-k counters over the entities of the streamed statuses, thread safe """
+
+    def __init__(self,
+                 window=3600,
+                 n_buckets=12,
+                 capacity=1000,
+                 sketch_width=2 ** 12,
+                 sketch_depth=4,
+                 fields=None,
+                 clock=time.time):
+
+        """
+        TrendCounter constructor
+        :param window: window length in seconds
+        :param n_buckets: number of buckets the window is split into, the window slides one bucket at a time
+        :param capacity: number of keys tracked by each bucket summary, for each field
+        :param sketch_width: width of the count-min sketch of each bucket
+        :param sketch_depth: depth of the count-min sketch of each bucket
+        :param fields: fields dict -> <field_name, func>, func takes a status and returns its keys,
+                       default default_trend_fields
+        :param clock: time function, returning seconds
+        """
+
+        self.window = window
+        self.n_buckets = n_buckets
+        self.bucket_length = float(window) / n_buckets
+        self.capacity = capacity
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.fields = default_trend_fields if fields is None else fields
+        self._clock = clock
+
+        # (bucket id, {field: (SpaceSaving, CountMinSketch)}), oldest first
+        self._buckets = deque()
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp):
+
+        """
+        Returns the bucket counters of a timestamp, sliding the window if needed
+        :param timestamp: seconds
+        :return: dict <field, (SpaceSaving, CountMinSketch)>
+        """
+
+        bucket_id = int(timestamp // self.bucket_length)
+        self._expire(bucket_id)
+        # late keys are counted in the current bucket
+        if not self._buckets or self._buckets[-1][0] < bucket_id:
+            self._buckets.append((bucket_id, {field: (SpaceSaving(self.capacity),
+                                                      CountMinSketch(self.sketch_width, self.sketch_depth))
+                                              for field in self.fields}))
+        return self._buckets[-1][1]
+
+    def _expire(self, bucket_id):
+
+        """
+        Drop the buckets out of the window ending at bucket_id
+        :param bucket_id: current bucket id
+        """
+
+        while self._buckets and self._buckets[0][0] <= bucket_id - self.n_buckets:
+            self._buckets.popleft()
+
+    def add(self, field, key, count=1, timestamp=None):
+
+        """
+        Count a key
+        :param field: field name, for instance 'hashtags'
+        :param key: key to count
+        :param count: increment
+        :param timestamp: seconds, if None the current time
+        """
+
+        with self._lock:
+            summary, sketch = self._bucket(self._clock() if timestamp is None else timestamp)[field]
+            summary.add(key, count)
+            sketch.add(key, count)
+
+    def add_status(self, status, timestamp=None):
+
+        """
+        Count the keys of all the fields of a status
+        :param status: tweepy Status obj
+        :param timestamp: seconds, if None the current time
+        """
+
+        keys = {field: func(status) for field, func in self.fields.items()}
+        with self._lock:
+            bucket = self._bucket(self._clock() if timestamp is None else timestamp)
+            for field, field_keys in keys.items():
+                summary, sketch = bucket[field]
+                for key in field_keys:
+                    summary.add(key)
+                    sketch.add(key)
+
+    def top(self, field, k=10):
+
+        """
+        Returns the k most frequent keys of a field within the window
+        :param field: field name
+        :param k: number of keys
+        :return: list of tuples (key, count), sorted by decreasing count, counts may be overestimated
+        """
+
+        totals = {}
+        with self._lock:
+            self._expire(int(self._clock() // self.bucket_length))
+            for _, bucket in self._buckets:
+                for key, (count, _) in bucket[field][0].counts().items():
+                    totals[key] = totals.get(key, 0) + count
+        return heapq.nlargest(k, totals.items(), key=lambda x: x[1])
+
+    def estimate(self, field, key):
+
+        """
+        Returns the count of a key within the window
+        :param field: field name
+        :param key: key to estimate
+        :return: estimated count, never lower than the real one
+        """
+
+        with self._lock:
+            self._expire(int(self._clock() // self.bucket_length))
+            return sum(bucket[field][1].estimate(key) for _, bucket in self._buckets)
+
+    def total(self, field):
+
+        """
+        Returns the number of keys of a field counted within the window
+        :param field: field name
+        """
+
+        with self._lock:
+            self._expire(int(self._clock() // self.bucket_length))
+            return sum(bucket[field][1].total for _, bucket in self._buckets)
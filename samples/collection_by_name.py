@@ -27,8 +27,8 @@ if __name__ == '__main__':
     # screen names of accounts to collect
     users_to_collect = ["Diletta Leotta", "lampajr", "rami kantari"]
 
-    for name in users_to_collect:
-        collector.collect_users_by_name(name, 10)
+    # run all the searches concurrently, each row is tagged with its originating query
+    collector.collect_users_by_names(users_to_collect, 10)
 
     # Save dataset
     collector.save_dataset(path="../dataset/similar.csv")
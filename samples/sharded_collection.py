@@ -0,0 +1,23 @@
+from ptdc import ShardedCollector
+
+if __name__ == '__main__':
+
+    # one worker process is started for each credentials set, each one with its own rate limit
+    credentials = [{"consumer_key": "xxxxxxxxxxxx",
+                    "consumer_key_secret": "xxxxxxxxxxxxxx",
+                    "access_token": "xxxxxxxxxxxxxxxxxxxxxxxx",
+                    "access_token_secret": "xxxxxxxxxxxxxx"},
+                   {"consumer_key": "yyyyyyyyyyyy",
+                    "consumer_key_secret": "yyyyyyyyyyyyyy",
+                    "access_token": "yyyyyyyyyyyyyyyyyyyyyyyy",
+                    "access_token_secret": "yyyyyyyyyyyyyy"}]
+
+    # screen names of accounts to collect
+    users_to_collect = ["", "", ""]
+
+    # the workers collect both accounts and statuses, closed when leaving the with block
+    with ShardedCollector(credentials=credentials, statuses=True) as collector:
+        collector.collect_accounts(users_to_collect, n_statuses=100)
+
+    # Save the merged dataset, statuses are saved at ../data/accounts_statuses.csv
+    collector.save_dataset(path="../data/accounts.csv")
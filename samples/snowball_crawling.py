@@ -0,0 +1,37 @@
+import sys
+
+from ptdc import authenticate, AccountCollector, SnowballCrawler
+
+if __name__ == '__main__':
+
+    if len(sys.argv) == 5:
+        consumer_key = sys.argv[1]
+        consumer_key_secret = sys.argv[2]
+        access_token = sys.argv[3]
+        access_token_secret = sys.argv[4]
+    else:
+        consumer_key = "xxxxxxxxxxxx"
+        consumer_key_secret = "xxxxxxxxxxxxxx"
+        access_token = "xxxxxxxxxxxxxxxxxxxxxxxx"
+        access_token_secret = "xxxxxxxxxxxxxx"
+
+    # Create the default API object of tweepy using provided authentication method
+    api = authenticate(consumer_key=consumer_key,
+                       consumer_key_secret=consumer_key_secret,
+                       access_token=access_token,
+                       access_token_secret=access_token_secret)
+
+    # Create your own AccountCollector, timeline features provide the accounts to expand
+    collector = AccountCollector(api=api)
+
+    # Create the crawler, accounts discovered by more accounts are crawled first
+    crawler = SnowballCrawler(collector=collector, n_statuses=200, priority="degree", max_depth=2)
+
+    # screen names of the seed accounts
+    crawler.seed(["", "", ""])
+
+    # Crawl 100 accounts at most, crawl can be called again for continuing
+    crawler.crawl(max_accounts=100)
+
+    # Save dataset
+    collector.save_dataset(path="../dataset/crawled.csv")
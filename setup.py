@@ -32,6 +32,10 @@ setup(
     packages=find_packages(exclude=['tests', 'samples', 'dataset']),
     install_requires=get_requirements(),
 
+    entry_points={
+        'console_scripts': ['ptdc=ptdc.cli:main'],
+    },
+
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
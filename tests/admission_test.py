@@ -0,0 +1,70 @@
+import unittest
+from types import SimpleNamespace
+
+from ptdc.admission import AdmissionController, FifoBuffer, PriorityBuffer, PriorityThreshold, ReservoirBuffer
+
+
+def status(user_id, followers=0):
+    return SimpleNamespace(user=SimpleNamespace(id=user_id, screen_name="user{}".format(user_id),
+                                                followers_count=followers))
+
+
+class BuffersTest(unittest.TestCase):
+
+    def test_fifo_drops_the_new_candidates(self):
+        buffer = FifoBuffer(size=2)
+        self.assertEqual([buffer.push(i, None) for i in range(4)], [0, 0, 1, 1])
+        self.assertEqual(buffer.items(), [0, 1])
+        self.assertEqual(buffer.pop(), 0)
+        self.assertEqual(len(buffer), 1)
+
+    def test_reservoir_keeps_size_candidates(self):
+        buffer = ReservoirBuffer(size=10)
+        dropped = sum(buffer.push(i, None) for i in range(1000))
+        self.assertEqual(dropped, 990)
+        self.assertEqual(len(buffer), 10)
+        self.assertEqual(len(set(buffer.items())), 10)
+        # not only the first arrivals
+        self.assertTrue(max(buffer.items()) >= 10)
+
+    def test_priority_keeps_the_highest_ones(self):
+        buffer = PriorityBuffer(priority=lambda s: s.user.followers_count, size=3)
+        for followers in (5, 1, 9, 7, 3, 8):
+            buffer.push(followers, status(followers, followers))
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual([buffer.pop() for _ in range(3)], [9, 8, 7])
+        self.assertEqual(len(buffer), 0)
+
+    def test_priority_restored_candidates_come_first(self):
+        buffer = PriorityBuffer(priority=lambda s: s.user.followers_count, size=3)
+        buffer.push("streamed", status(1, 100))
+        buffer.push("restored", None)
+        self.assertEqual(buffer.items(), ["restored", "streamed"])
+
+    def test_priority_heaps_stay_bounded(self):
+        buffer = PriorityBuffer(priority=lambda s: s.user.followers_count, size=10)
+        for i in range(10000):
+            buffer.push(i, status(i, i % 97))
+            if i % 3 == 0:
+                buffer.pop()
+        self.assertTrue(len(buffer._items) + len(buffer._best) <= 4 * len(buffer) + 66)
+
+
+class AdmissionControllerTest(unittest.TestCase):
+
+    def test_offer_take_and_stats(self):
+        controller = AdmissionController(policies=[PriorityThreshold(lambda s: s.user.followers_count, 10)],
+                                         buffer=FifoBuffer(size=1))
+        self.assertFalse(controller.offer(status(1, followers=5)))
+        self.assertTrue(controller.offer(status(2, followers=50)))
+        self.assertTrue(controller.offer(status(3, followers=50)))
+        controller.push(4, "user4")
+        self.assertEqual(controller.pending(), [(2, "user2")])
+        self.assertEqual(controller.take(timeout=0), (2, "user2"))
+        self.assertIsNone(controller.take(timeout=0))
+        self.assertEqual(controller.stats(), {"offered": 3, "admitted": 1, "rejected": 1, "dropped": 2,
+                                              "pending": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
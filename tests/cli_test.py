@@ -0,0 +1,34 @@
+import argparse
+import unittest
+from unittest import mock
+
+from fakeapi import FakeAPI
+
+from ptdc import cli
+from ptdc.collector import AccountCollector
+
+
+class StreamCommandTest(unittest.TestCase):
+
+    def run_stream(self, options):
+        collector = AccountCollector(api=FakeAPI(), verbose=False)
+        config = {"collector": {"n_statuses": 10}, "stream": options, "output": "unused.csv"}
+        with mock.patch.object(cli, "build_collector", return_value=collector), \
+                mock.patch("ptdc.streamer.OnlineStreamer.stream") as stream, \
+                mock.patch.object(collector, "save_dataset"):
+            cli.stream(argparse.Namespace(resume=False, output=None), config)
+        return stream
+
+    def test_filter_options_go_to_the_stream(self):
+        stream = self.run_stream({"track": ["photo"], "stall_warnings": False, "filter_level": "low",
+                                  "encoding": "utf8", "data_limit": 10})
+        stream.assert_called_once_with(track=["photo"], stall_warnings=False, filter_level="low", encoding="utf8")
+
+    def test_unknown_options(self):
+        with self.assertRaises(ValueError) as context:
+            self.run_stream({"track": ["photo"], "unknown_option": 1})
+        self.assertIn("unknown_option", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,71 @@
 import unittest
 
+from fakeapi import FakeAPI
+
 
 class CollectorTest(unittest.TestCase):
 
     def __init__(self):
-        super().__init__()
\ No newline at end of file
+        super().__init__()
+
+
+class TimelineFeaturesTest(unittest.TestCase):
+
+    """ Regression tests of the account timeline features """
+
+    def collect(self, statuses_collector):
+        from ptdc.collector import AccountCollector, StatusCollector
+        api = FakeAPI()
+        collector = AccountCollector(api=api,
+                                     statuses_collector=StatusCollector(api=api, verbose=False)
+                                     if statuses_collector else None,
+                                     verbose=False)
+        return collector.collect_account(screen_name="user1", n_statuses=30)
+
+    def check_ids(self, row):
+        self.assertEqual(row["replied_user_ids"], [1234567890123456789] * 3)
+        self.assertEqual(row["replied_status_ids"], [1234567890123456789 + i for i in (21, 11, 1)])
+        self.assertEqual(row["retweeted_user_ids"], [987654321987654321] * 3)
+        self.assertEqual(row["retweeted_status_ids"], [22000, 12000, 2000])
+        self.assertEqual(row["quoted_user_ids"], [])
+        self.assertEqual(row["mentioned_user_ids"], [1111111111111111111] * 30)
+        for feature in ("replied_user_ids", "replied_status_ids", "retweeted_user_ids", "retweeted_status_ids",
+                        "mentioned_user_ids"):
+            self.assertTrue(all(isinstance(x, int) for x in row[feature]))
+
+    def test_timeline_ids_without_statuses_collector(self):
+        self.check_ids(self.collect(statuses_collector=False))
+
+    def test_timeline_ids_with_statuses_collector(self):
+        self.check_ids(self.collect(statuses_collector=True))
+
+
+class TimelinePagesTest(unittest.TestCase):
+
+    """ Regression tests of the timeline pagination """
+
+    def test_persistent_first_page_error_ends_the_pagination(self):
+        import tweepy
+        from ptdc.collector import StatusCollector
+        from ptdc.retry import AccountError, RetryPolicy
+        for prefetch in (False, True):
+            api = FakeAPI(errors={"user1": tweepy.TweepError("Internal error", api_code=131)})
+            collector = StatusCollector(api=api,
+                                        prefetch=prefetch,
+                                        retry_policy=RetryPolicy(max_retries=3, sleep=lambda seconds: None),
+                                        verbose=False)
+            with self.assertRaises(AccountError):
+                collector.collect_statuses(screen_name="user1", n_statuses=30)
+            # first request and its retries only
+            self.assertEqual(len(api.timeline_requests), 4)
+
+    def test_pagination(self):
+        from ptdc.collector import StatusCollector
+        api = FakeAPI(n_statuses=450)
+        statuses = StatusCollector(api=api, verbose=False).collect_statuses(screen_name="user1", n_statuses=420)
+        self.assertEqual(list(statuses["id"]), list(range(450, 30, -1)))
+        self.assertEqual([request["count"] for request in api.timeline_requests], [200, 200, 20])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from ptdc.connection import Backoff, ConnectionManager
+
+
+class BackoffTest(unittest.TestCase):
+
+    def test_exponential_growth_and_cap(self):
+        backoff = Backoff(5, 40, jitter=0)
+        self.assertEqual([backoff.next_delay() for _ in range(5)], [5, 10, 20, 40, 40])
+        backoff.reset()
+        self.assertEqual(backoff.next_delay(), 5)
+
+    def test_linear_growth(self):
+        backoff = Backoff(0.25, 1, factor=1, jitter=0)
+        self.assertEqual([backoff.next_delay() for _ in range(5)], [0.25, 0.5, 0.75, 1, 1])
+
+    def test_jitter(self):
+        backoff = Backoff(10, 10, jitter=0.5)
+        self.assertTrue(all(10 <= backoff.next_delay() <= 15 for _ in range(100)))
+
+
+class ConnectionManagerTest(unittest.TestCase):
+
+    def test_wait_by_kind(self):
+        slept = []
+        manager = ConnectionManager(network_backoff=Backoff(1, 4, factor=1, jitter=0),
+                                    http_backoff=Backoff(5, 320, jitter=0),
+                                    throttle_backoff=Backoff(60, 960, jitter=0),
+                                    sleep=slept.append)
+        for kind in (ConnectionManager.HTTP, ConnectionManager.HTTP, ConnectionManager.THROTTLE,
+                     ConnectionManager.NETWORK, ConnectionManager.STALL):
+            manager.wait(kind)
+        # stalls share the network backoff
+        self.assertEqual(slept, [5, 10, 60, 1, 2])
+        stats = manager.stats()
+        self.assertEqual(stats["reconnects"], {"network": 1, "http": 2, "throttle": 1, "stall": 1})
+        self.assertEqual(stats["total_reconnects"], 5)
+
+        manager.connected()
+        manager.wait(ConnectionManager.HTTP)
+        self.assertEqual(slept[-1], 5)
+
+    def test_downtime_and_stall(self):
+        with mock.patch("ptdc.connection.time.time") as clock:
+            clock.return_value = 100.0
+            manager = ConnectionManager(stall_timeout=90, sleep=lambda seconds: None)
+            self.assertFalse(manager.is_stalled())
+            manager.connected()
+            clock.return_value = 191.0
+            self.assertTrue(manager.is_stalled())
+            manager.activity()
+            self.assertFalse(manager.is_stalled())
+            manager.disconnected()
+            clock.return_value = 201.0
+            self.assertEqual(manager.stats()["downtime"], 10.0)
+            manager.connected()
+            clock.return_value = 301.0
+            self.assertEqual(manager.stats()["downtime"], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
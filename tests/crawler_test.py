@@ -0,0 +1,49 @@
+import unittest
+
+import tweepy
+from fakeapi import FakeAPI
+
+from ptdc.collector import AccountCollector
+from ptdc.crawler import SnowballCrawler
+from ptdc.retry import RetryPolicy
+
+
+class ProtectedTimelineAPI(FakeAPI):
+
+    """ The timeline of user3 is not authorized """
+
+    def user_timeline(self, screen_name=None, **kwargs):
+        if screen_name == "user3":
+            raise tweepy.TweepError("Not authorized.", api_code=179)
+        return super(ProtectedTimelineAPI, self).user_timeline(screen_name=screen_name, **kwargs)
+
+
+class SnowballCrawlerTest(unittest.TestCase):
+
+    def crawler(self):
+        api = ProtectedTimelineAPI(errors={"user5": tweepy.TweepError("User has been suspended.", api_code=63)})
+        collector = AccountCollector(api=api, retry_policy=RetryPolicy(sleep=lambda seconds: None), verbose=False)
+        return SnowballCrawler(collector, n_statuses=30, max_depth=1, priority="bfs", verbose=False)
+
+    def test_expands_through_interactions(self):
+        crawler = self.crawler()
+        crawler.seed(["user1"])
+        crawler.crawl()
+        # replied, retweeted and mentioned accounts
+        self.assertEqual(set(crawler.collector.dataset()["id"]),
+                         {1, 1234567890123456789, 987654321987654321, 1111111111111111111})
+        self.assertEqual(crawler.count, 4)
+
+    def test_error_rows_are_failures(self):
+        crawler = self.crawler()
+        crawler.seed(["user5", "user3"])
+        crawler.crawl(max_accounts=1)
+        # neither the suspended account nor the protected timeline are collected, nor expanded
+        self.assertEqual(crawler.count, 0)
+        self.assertEqual(crawler.n_failed, 2)
+        self.assertEqual(len(crawler.frontier), 0)
+        self.assertEqual(sorted(crawler.collector.dataset()["collection_error"]), ["protected", "suspended"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from fakeapi import FakeAPI
+
+from ptdc.dedup import NearDuplicateIndex
+
+
+class NearDuplicateIndexTest(unittest.TestCase):
+
+    def test_clusters(self):
+        index = NearDuplicateIndex(threshold=0.5)
+        first = index.add("Check out our new summer collection, free shipping today only!", key=1)
+        self.assertEqual(index.add("check out our NEW summer collection,  free shipping today only!!", key=2), first)
+        self.assertNotEqual(index.add("The match was postponed because of the heavy rain in the city", key=3),
+                            first)
+        self.assertEqual(index.query("Check out our new summer collection, free shipping today only"), first)
+        self.assertIsNone(index.query("Completely unrelated words about cooking pasta at home tonight"))
+        self.assertEqual(index.representative(first), 1)
+        self.assertEqual(index.cluster_size(first), 2)
+        self.assertEqual((len(index), index.n_clusters, index.n_duplicates), (3, 2, 1))
+        self.assertEqual(list(index.cluster_sizes()), [2, 1])
+
+    def test_signatures_depend_on_the_seed(self):
+        text = "the same text hashed twice"
+        self.assertEqual(list(NearDuplicateIndex().signature(text)), list(NearDuplicateIndex().signature(text)))
+        self.assertNotEqual(list(NearDuplicateIndex(seed=1).signature(text)),
+                            list(NearDuplicateIndex(seed=2).signature(text)))
+
+    def test_collector_drops_duplicates(self):
+        from ptdc.collector import StatusCollector
+        # every status of the fake timelines has the same text
+        index = NearDuplicateIndex()
+        collector = StatusCollector(api=FakeAPI(n_statuses=30), dedup=index, drop_duplicates=True, verbose=False)
+        statuses = collector.collect_statuses(screen_name="user1", n_statuses=30)
+        self.assertEqual(list(statuses["id"]), [30])
+        self.assertEqual(collector.n_dropped, 29)
+        # the representative is kept when collected again
+        statuses = collector.collect_statuses(screen_name="user1", n_statuses=30)
+        self.assertEqual(list(statuses["id"]), [30])
+
+        statuses = StatusCollector(api=FakeAPI(n_statuses=30), dedup=NearDuplicateIndex(),
+                                   verbose=False).collect_statuses(screen_name="user1", n_statuses=30)
+        self.assertEqual(statuses.shape[0], 30)
+        self.assertEqual(set(statuses[StatusCollector.DUPLICATE_FEATURE]), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
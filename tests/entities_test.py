@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+from fakeapi import FakeAPI
+
+from ptdc.collector import AccountCollector, StatusCollector
+from ptdc.entities import EntityTables
+
+
+class EntityTablesTest(unittest.TestCase):
+
+    def test_add_and_counts(self):
+        tables = EntityTables(capacity=1)
+        tables.add(1, "hashtags", ["a", "b"])
+        tables.add(2, "hashtags", ["a"])
+        tables.add(2, "symbols", [{"text": "BTC"}])
+        tables.add(3, "hashtags", None)
+        self.assertEqual(len(tables), 4)
+        self.assertEqual(tables.values("hashtags")["status_id"].tolist(), [1, 1, 2])
+        self.assertEqual(tables.counts("hashtags").to_dict(), {"a": 2, "b": 1})
+        self.assertEqual(tables.values("symbols")["value"].tolist(), ["BTC"])
+
+    def test_stored_chunk_is_not_copied(self):
+        api = FakeAPI(n_statuses=30)
+        collector = StatusCollector(api=api, entity_tables=True, verbose=False)
+        statuses = collector.collect_statuses(screen_name="user1", n_statuses=30)
+        stored = collector.store().chunks()[0]
+        self.assertNotIn("hashtags", stored.columns)
+        self.assertIn("hashtags", statuses.columns)
+        self.assertTrue(np.shares_memory(stored._mgr.blocks[0].values, statuses._mgr.blocks[0].values))
+        self.assertEqual(collector.entity_tables().counts("hashtags").to_dict(), {"tag": 30})
+
+    def test_timeline_features_keep_the_entities(self):
+        api = FakeAPI(n_statuses=30)
+        collector = AccountCollector(api=api, verbose=False,
+                                     statuses_collector=StatusCollector(api=api, entity_tables=True, verbose=False))
+        row = collector.collect_account(screen_name="user1", n_statuses=30)
+        self.assertEqual(row["n_statuses_collected"], 30)
+        self.assertEqual(row["mentioned_user_ids"], [1111111111111111111] * 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
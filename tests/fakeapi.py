@@ -0,0 +1,89 @@
+"""
+Stand-in of the tweepy API used by the tests, serving synthetic users and timelines without any network access.
+Status ids count down from n_statuses, by default the ids ending in 1 are replies and the ones ending in 2 retweets.
+"""
+
+import tweepy
+from tweepy.models import Status, User
+
+
+def default_kind(status_id):
+    if status_id % 10 == 1:
+        return "reply"
+    if status_id % 10 == 2:
+        return "retweet"
+    return None
+
+
+class FakeAPI(object):
+
+    """ Minimal stand-in of the tweepy API, timelines alternate plain statuses, replies and retweets """
+
+    def __init__(self, n_statuses=30, kind=default_kind, errors=None):
+
+        """
+        FakeAPI constructor
+        :param n_statuses: number of statuses of every timeline
+        :param kind: function status id --> 'reply', 'retweet' or None (plain status)
+        :param errors: dict <screen_name, TweepError> raised by get_user and user_timeline for that account
+        """
+
+        self.n_statuses = n_statuses
+        self.kind = kind
+        self.errors = {} if errors is None else errors
+        self.parser = tweepy.parsers.ModelParser()
+        # user_timeline keyword arguments of every request
+        self.timeline_requests = []
+
+    @staticmethod
+    def user_id(screen_name):
+        return int(str(screen_name)[len("user"):]) if str(screen_name).startswith("user") else int(screen_name)
+
+    @staticmethod
+    def user_json(user_id):
+        return {"id": user_id, "id_str": str(user_id), "name": "user", "screen_name": "user{}".format(user_id),
+                "location": "", "url": None, "description": "", "protected": False, "verified": False,
+                "followers_count": 10, "friends_count": 5, "listed_count": 0, "favourites_count": 0,
+                "statuses_count": 30, "created_at": "Wed Oct 10 20:19:24 +0000 2018", "geo_enabled": False,
+                "lang": None, "contributors_enabled": False, "profile_background_color": "fff",
+                "profile_background_image_url_https": None, "profile_background_tile": False,
+                "profile_image_url_https": "", "profile_link_color": "", "profile_text_color": "",
+                "profile_use_background_image": True, "default_profile": True, "default_profile_image": False}
+
+    def status_json(self, status_id, user_id, text="hello #tag"):
+        data = {"id": status_id, "id_str": str(status_id), "created_at": "Wed Oct 10 20:19:24 +0000 2018",
+                "full_text": text, "lang": "en", "coordinates": None, "retweet_count": 0,
+                "favorite_count": 0, "source": "web", "truncated": False, "is_quote_status": False,
+                "in_reply_to_status_id": None, "in_reply_to_user_id": None, "in_reply_to_screen_name": None,
+                "user": self.user_json(user_id), "place": None,
+                "entities": {"hashtags": [{"text": "tag"}], "symbols": [], "urls": [],
+                             "user_mentions": [{"screen_name": "user2", "id": 1111111111111111111}]}}
+        kind = self.kind(status_id)
+        if kind == "reply":
+            # 64 bits snowflake ids, not exactly representable as float
+            data["in_reply_to_status_id"] = 1234567890123456789 + status_id
+            data["in_reply_to_user_id"] = 1234567890123456789
+        elif kind == "retweet":
+            data["retweeted_status"] = dict(self.status_json(status_id * 1000, 987654321987654321))
+        return data
+
+    def _raise(self, screen_name):
+        if screen_name in self.errors:
+            raise self.errors[screen_name]
+
+    def get_user(self, screen_name=None, **kwargs):
+        self._raise(screen_name)
+        return User.parse(self, self.user_json(self.user_id(screen_name)))
+
+    def user_timeline(self, screen_name=None, count=20, max_id=None, since_id=None, **kwargs):
+        self.timeline_requests.append(dict(kwargs, screen_name=screen_name, count=count, max_id=max_id))
+        self._raise(screen_name)
+        top = self.n_statuses if max_id is None else min(max_id, self.n_statuses)
+        bottom = max(0, top - count) if since_id is None else max(since_id, top - count)
+        page = [self.status_json(status_id, self.user_id(screen_name)) for status_id in range(top, bottom, -1)]
+        # as the server, the page is taken before removing replies and retweets
+        if kwargs.get("exclude_replies"):
+            page = [status for status in page if status["in_reply_to_status_id"] is None]
+        if kwargs.get("include_rts") is False:
+            page = [status for status in page if "retweeted_status" not in status]
+        return [Status.parse(self, status) for status in page]
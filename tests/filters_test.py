@@ -0,0 +1,36 @@
+import unittest
+from datetime import datetime
+
+from fakeapi import FakeAPI
+
+from ptdc.collector import StatusCollector
+from ptdc.filters import DateRange, ExcludeReplies, ExcludeRetweets, Language, datetime_to_id
+
+
+class FiltersTest(unittest.TestCase):
+
+    def test_timeline_starting_with_a_full_page_of_replies(self):
+        # the 200 most recent statuses are replies, the 20 oldest ones are not
+        api = FakeAPI(n_statuses=220, kind=lambda status_id: "reply" if status_id > 20 else None)
+        collector = StatusCollector(api=api, verbose=False)
+        statuses = collector.collect_statuses(screen_name="user1", n_statuses=220, filter_status=ExcludeReplies())
+        self.assertEqual(sorted(statuses["id"]), list(range(1, 21)))
+        self.assertTrue(all("exclude_replies" not in request for request in api.timeline_requests))
+
+    def test_exclude_retweets_client_side(self):
+        api = FakeAPI(n_statuses=30)
+        statuses = StatusCollector(api=api, verbose=False).collect_statuses(screen_name="user1", n_statuses=30,
+                                                                            filter_status=ExcludeRetweets())
+        self.assertEqual(statuses.shape[0], 27)
+        self.assertTrue(all(x is None for x in statuses["retweeted_status"]))
+        self.assertTrue(all("include_rts" not in request for request in api.timeline_requests))
+
+    def test_combined_request_params(self):
+        since, until = datetime(2019, 1, 1), datetime(2019, 6, 1)
+        combined = ExcludeReplies() & Language("en") & DateRange(since=since, until=until)
+        self.assertEqual(combined.request_params(), {"since_id": datetime_to_id(since) - 1,
+                                                     "max_id": datetime_to_id(until) - 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
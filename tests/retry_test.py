@@ -0,0 +1,68 @@
+import unittest
+
+import tweepy
+from fakeapi import FakeAPI
+
+from ptdc.collector import AccountCollector
+from ptdc.retry import AccountError, CircuitBreaker, RetryPolicy, PROTECTED, RETRIES_EXHAUSTED
+
+
+class Response(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def http_error(status_code, api_code=None):
+    return tweepy.TweepError("error", response=Response(status_code), api_code=api_code)
+
+
+class TimelineErrorAPI(FakeAPI):
+
+    """ Accounts are retrieved, their timelines raise the given error """
+
+    def __init__(self, error):
+        super(TimelineErrorAPI, self).__init__()
+        self.error = error
+
+    def user_timeline(self, *args, **kwargs):
+        raise self.error
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def policy(self):
+        return RetryPolicy(max_retries=2, breaker=CircuitBreaker(threshold=1), sleep=lambda seconds: None)
+
+    def test_revoked_credentials_are_not_blamed_on_the_account(self):
+        policy = self.policy()
+        for api_code in (32, 89, None):
+            api = FakeAPI(errors={"user1": http_error(401, api_code)})
+            collector = AccountCollector(api=api, retry_policy=policy, verbose=False)
+            with self.assertRaises(tweepy.TweepError) as context:
+                collector.collect_account(screen_name="user1", n_statuses=10)
+            self.assertNotIsInstance(context.exception, AccountError)
+        self.assertTrue(policy.breaker.allow("user1"))
+        self.assertEqual(len(collector.dataset()), 0)
+
+    def test_protected_timeline(self):
+        policy = self.policy()
+        collector = AccountCollector(api=TimelineErrorAPI(http_error(401)), retry_policy=policy, verbose=False)
+        row = collector.collect_account(screen_name="user1", n_statuses=10)
+        self.assertEqual(row["id"], 1)
+        self.assertEqual(row["collection_error"], PROTECTED)
+        self.assertFalse(policy.breaker.allow("user1"))
+
+    def test_transient_errors_are_bounded(self):
+        policy = self.policy()
+        api = TimelineErrorAPI(http_error(503))
+        collector = AccountCollector(api=api, retry_policy=policy, verbose=False)
+        row = collector.collect_account(screen_name="user1", n_statuses=10)
+        self.assertEqual(row["collection_error"], RETRIES_EXHAUSTED)
+        self.assertEqual(policy.n_retries, 2)
+        with self.assertRaises(AccountError):
+            policy.call("user1", lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from fakeapi import FakeAPI
+
+from ptdc.sharding import ShardedCollector, WorkerError, shard_of
+
+
+def fake_api_factory(**credentials):
+    if credentials.get("die"):
+        os._exit(3)
+    return FakeAPI(n_statuses=10)
+
+
+class ShardedCollectorTest(unittest.TestCase):
+
+    def collector(self, credentials):
+        return ShardedCollector(credentials=credentials, api_factory=fake_api_factory, start_method="fork",
+                                timeout=30, verbose=False)
+
+    def test_shard_of(self):
+        self.assertEqual(shard_of("User1", 7), shard_of("user1", 7))
+        self.assertTrue(all(0 <= shard_of(i, 3) < 3 for i in range(100)))
+
+    def test_streamed_users_are_sharded_by_id(self):
+        collector = self.collector([{}] * 4)
+        queued = []
+        collector.start = lambda: None
+        collector._put = lambda shard, task: queued.append(shard)
+        # the same account streamed before and after being renamed
+        collector.process(screen_name="before", n_statuses=10, user_id=123)
+        collector.process(screen_name="after", n_statuses=10, user_id=123)
+        self.assertEqual(queued, [shard_of(123, 4)] * 2)
+
+    def test_merge(self):
+        with self.collector([{}, {}]) as collector:
+            collector.collect_accounts(["user{}".format(i) for i in range(1, 7)], n_statuses=10)
+            accounts, statuses = collector.merge(wait=True)
+        self.assertEqual(sorted(accounts["id"]), [1, 2, 3, 4, 5, 6])
+        self.assertIsNone(statuses)
+        self.assertEqual(collector.n_collected, 6)
+
+    def test_dead_worker(self):
+        collector = self.collector([{}, {"die": True}])
+        collector.start()
+        with self.assertRaises(WorkerError):
+            collector.get_state()
+        with self.assertRaises(WorkerError):
+            collector.close()
+        self.assertFalse(collector.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from ptdc.snapshot import SnapshotStore
+
+
+class SnapshotStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "changes.jsonl")
+
+    def row(self, followers):
+        return {"id": np.int64(1), "followers_count": followers, "created_at": datetime(2018, 10, 10, 20, 19, 24),
+                "replied_user_ids": (1234567890123456789,), "location": None}
+
+    def test_change_only_deltas(self):
+        store = SnapshotStore(verbose=False)
+        self.assertEqual(store.update(self.row(10), timestamp=1), 4)
+        self.assertEqual(store.update(self.row(10), timestamp=2), 0)
+        self.assertEqual(store.update(self.row(12), timestamp=3), 1)
+        self.assertEqual(store.state_at(2)["followers_count"].tolist(), [10])
+        self.assertEqual(store.state_at()["followers_count"].tolist(), [12])
+
+    def test_unchanged_accounts_after_reload(self):
+        store = SnapshotStore(verbose=False)
+        store.update(self.row(10), timestamp=1)
+        store.save(self.path)
+
+        reloaded = SnapshotStore(verbose=False)
+        reloaded.load(self.path)
+        self.assertEqual(reloaded.update(self.row(10), timestamp=2), 0)
+        self.assertEqual(reloaded.latest(1), store.latest(1))
+
+    def test_load_keeps_unsaved_deltas(self):
+        store = SnapshotStore(verbose=False)
+        store.update(self.row(10), timestamp=1)
+        store.save(self.path)
+
+        other = SnapshotStore(verbose=False)
+        other.update(dict(self.row(10), id=2), timestamp=2)
+        other.load(self.path)
+        other.update(dict(self.row(11), id=2), timestamp=3)
+        other.save(self.path)
+
+        reloaded = SnapshotStore(verbose=False)
+        reloaded.load(self.path)
+        self.assertEqual(reloaded.n_changes(), 9)
+        self.assertEqual(reloaded.latest(2)["followers_count"], 11)
+        self.assertEqual(reloaded.latest(1)["followers_count"], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
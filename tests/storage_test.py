@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+from fakeapi import FakeAPI
+
+from ptdc.storage import FrameStore, SQLiteStore
+
+
+class SQLiteStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "ptdc.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def store(self, batch_size=500):
+        return SQLiteStore(self.path, "statuses", batch_size=batch_size).init_columns(
+            ["id", "user_id", "created_at", "lang", "hashtags"])
+
+    def test_upsert_replaces_the_rows_with_the_same_key(self):
+        store = self.store(batch_size=2)
+        store.append(pd.Series({"id": 1, "user_id": 10, "created_at": datetime(2020, 1, 1), "lang": "en",
+                                "hashtags": ["a"]}))
+        store.append(pd.DataFrame([{"id": 2, "user_id": 10, "created_at": datetime(2020, 1, 2), "lang": "it",
+                                    "hashtags": []},
+                                   {"id": 1, "user_id": 10, "created_at": datetime(2020, 1, 1), "lang": "en",
+                                    "hashtags": ["a", "b"]}]))
+        self.assertEqual(len(store), 2)
+        frame = store.query(order_by="id")
+        self.assertEqual(list(frame["id"]), [1, 2])
+        self.assertEqual(list(frame["hashtags"]), [["a", "b"], []])
+        self.assertEqual(list(frame["created_at"]), [pd.Timestamp(2020, 1, 1), pd.Timestamp(2020, 1, 2)])
+        store.close()
+
+    def test_kinds_and_rows_survive_a_reopen(self):
+        store = self.store()
+        store.append(pd.Series({"id": 1, "user_id": 10, "created_at": datetime(2020, 1, 1), "lang": "en",
+                                "hashtags": ["a"]}))
+        store.close()
+        frame = self.store().frame()
+        self.assertEqual(list(frame["hashtags"]), [["a"]])
+        self.assertEqual(list(frame["created_at"]), [pd.Timestamp(2020, 1, 1)])
+
+    def test_query(self):
+        store = self.store()
+        store.append(pd.DataFrame([{"id": i, "user_id": i % 2, "created_at": datetime(2020, 1, i),
+                                    "lang": "en" if i % 2 else "it", "hashtags": None} for i in range(1, 8)]))
+        frame = store.query(columns=["id"], where="lang = ? AND created_at >= ?", params=("en", "2020-01-03"),
+                            order_by="created_at DESC", limit=2)
+        self.assertEqual(list(frame.columns), ["id"])
+        self.assertEqual(list(frame["id"]), [7, 5])
+        store.clear()
+        self.assertEqual(len(store), 0)
+        store.close()
+
+    def test_missing_key_column(self):
+        with self.assertRaises(ValueError):
+            SQLiteStore(self.path, "statuses").init_columns(["user_id"])
+
+    def test_recollected_timeline_is_upserted(self):
+        from ptdc.collector import StatusCollector
+        collector = StatusCollector(api=FakeAPI(n_statuses=30), storage=SQLiteStore(self.path, "statuses"),
+                                    verbose=False)
+        collector.collect_statuses(screen_name="user1", n_statuses=30)
+        collector.collect_statuses(screen_name="user1", n_statuses=30)
+        self.assertEqual(len(collector.store()), 30)
+        frame = collector.store().query(columns=["id"], order_by="id DESC")
+        self.assertEqual(list(frame["id"]), list(range(30, 0, -1)))
+        collector.store().close()
+
+
+class FrameStoreTest(unittest.TestCase):
+
+    def test_rows_and_chunks(self):
+        store = FrameStore(columns=["id", "lang"])
+        chunk = pd.DataFrame([{"id": 2, "lang": "it"}, {"id": 3, "lang": "en"}])
+        store.append(pd.Series({"id": 1, "lang": "en"}))
+        self.assertIs(store.append(chunk), chunk)
+        self.assertEqual(len(store), 3)
+        chunks = store.chunks()
+        self.assertEqual(len(chunks), 2)
+        self.assertIs(chunks[1], chunk)
+        self.assertEqual(list(store.frame()["id"]), [1, 2, 3])
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.frame().shape[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()